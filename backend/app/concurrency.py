@@ -0,0 +1,271 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import anyio
+from fastapi import HTTPException
+
+from app.metrics import REJECTED_REQUESTS, drain_metrics, merge_metrics
+from app.profiler import SamplingProfiler, current_profile
+
+# Processes that run model work (predictions, team search) for this API worker.
+# 0 runs it on threads in this process instead, under the same limits.
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "2"))
+MODEL_SLOTS = MODEL_WORKERS if MODEL_WORKERS > 0 else max(1, os.cpu_count() or 1)
+
+# Model calls allowed to wait for a free worker before new ones get a 429
+MODEL_QUEUE_DEPTH = int(os.getenv("MODEL_QUEUE_DEPTH", "64"))
+
+# Single-team calls may use every slot; batch and search calls at most half,
+# so a burst of them can't starve the single-team ones
+LIGHT_QUEUE_DEPTH = 64
+HEAVY_QUEUE_DEPTH = 8
+# Freed slots go to light calls first, but at most this many in a row while a heavy one waits
+LIGHT_BEFORE_HEAVY = 32
+WORKER_READY_TIMEOUT = 300
+
+
+class ConcurrencyLimit:
+    """
+    At most `concurrency` calls at once and `queue_depth` more waiting; any
+    further caller gets a 429 straight away instead of queueing without bound.
+    A freed slot goes to the oldest light waiter, or the oldest heavy one
+    after LIGHT_BEFORE_HEAVY light handoffs in a row.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_depth: int, heavy: bool = False):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.heavy = heavy
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._queues = (deque(), deque())  # waiters' futures: light, heavy
+        self._light_streak = 0
+        self._loop = None
+
+    def _check_loop(self):
+        # Waiters belong to one event loop: test clients run each app instance on a fresh one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._queues = loop, (deque(), deque())
+            self.active = self.waiting = 0
+        return loop
+
+    async def acquire(self, heavy: bool = False):
+        loop = self._check_loop()
+        if self.active < self.concurrency and not self.waiting:
+            self.active += 1
+            return
+        if self.waiting >= self.queue_depth:
+            self.rejected += 1
+            REJECTED_REQUESTS.inc(self.name)
+            raise HTTPException(status_code=429, detail=f"Too many {self.name} requests in flight, retry shortly",
+                                headers={"Retry-After": "1"})
+
+        waiter = loop.create_future()
+        queue = self._queues[heavy]
+        queue.append(waiter)
+        self.waiting += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                if waiter in queue:
+                    queue.remove(waiter)
+            else:
+                # Handed a slot just as the caller went away: pass it on
+                self.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        light, heavy = self._queues
+        order = (heavy, light) if self._light_streak >= LIGHT_BEFORE_HEAVY else (light, heavy)
+        for queue in order:
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._light_streak = self._light_streak + 1 if queue is light and heavy else 0
+                    waiter.set_result(None)  # the slot moves to the waiter; `active` is unchanged
+                    return
+        self.active -= 1
+
+    async def __aenter__(self):
+        await self.acquire(self.heavy)
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def status(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue_depth,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected_total": self.rejected,
+        }
+
+
+_pool_limit = ConcurrencyLimit("model-pool", MODEL_SLOTS, MODEL_QUEUE_DEPTH)
+_route_limits = {}
+
+
+def route_limit(name: str, heavy: bool = False) -> ConcurrencyLimit:
+    """The concurrency limit of one route's model work, registered for `limits_status`."""
+    if heavy:
+        limit = ConcurrencyLimit(name, max(1, MODEL_SLOTS // 2), HEAVY_QUEUE_DEPTH, heavy=True)
+    else:
+        limit = ConcurrencyLimit(name, MODEL_SLOTS, LIGHT_QUEUE_DEPTH)
+    _route_limits[name] = limit
+    return limit
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_ready = None
+_thread_limiters = {}
+
+
+def _init_worker(ready, cache_path: str):
+    # A worker runs one call at a time; the second connection is for the synergy retrain thread
+    os.environ["DB_POOL_SIZE"] = "1"
+    os.environ["DB_MAX_OVERFLOW"] = "1"
+    # Calls for the same team land on any worker, so the workers share their cached answers
+    os.environ["RESPONSE_CACHE_PATH"] = cache_path
+    from app.startup import warm_up
+    warm_up(data_views=False)
+    ready.put(os.getpid())
+
+
+def _call(function, args: tuple, profile_interval: float = None):
+    """
+    Worker-side wrapper: the result plus the metrics and cache stats the call
+    produced, and its sampled stacks when the request is being profiled.
+    """
+    from app.services.response_cache import local_cache_stats
+    profiler = None
+    if profile_interval:
+        profiler = SamplingProfiler("model worker", profile_interval)
+        profiler.start()
+    try:
+        result = function(*args)
+    finally:
+        changes = drain_metrics()
+        samples = profiler.collect() if profiler is not None else None
+    return result, changes, os.getpid(), local_cache_stats(), samples
+
+
+def get_model_pool() -> ProcessPoolExecutor:
+    global _pool, _ready
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process has threads (feedback flusher, dispatchers) that fork would copy mid-state
+            context = multiprocessing.get_context("spawn")
+            _ready = context.Queue()
+            cache_path = os.getenv("RESPONSE_CACHE_PATH") or os.path.join(
+                tempfile.mkdtemp(prefix="unitematch-cache-"), "responses.db"
+            )
+            _pool = ProcessPoolExecutor(
+                max_workers=MODEL_WORKERS, mp_context=context, initializer=_init_worker,
+                initargs=(_ready, cache_path)
+            )
+        return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool (a worker crashed or was killed) so the next call starts a new one."""
+    global _pool
+    from app.services.response_cache import forget_worker_cache_stats
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            forget_worker_cache_stats()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _thread_limiter() -> anyio.CapacityLimiter:
+    loop = asyncio.get_running_loop()
+    limiter = _thread_limiters.get(loop)
+    if limiter is None:
+        limiter = _thread_limiters[loop] = anyio.CapacityLimiter(MODEL_SLOTS)
+    return limiter
+
+
+async def run_model(limit: ConcurrencyLimit, function, *args):
+    """
+    Run blocking model work without holding up the event loop: in the model
+    pool, or on a dedicated thread when MODEL_WORKERS=0. Raises a 429
+    HTTPException when the route's limit or the pool is saturated.
+    """
+    async with limit:
+        await _pool_limit.acquire(limit.heavy)
+        try:
+            return await _run(function, args)
+        finally:
+            _pool_limit.release()
+
+
+async def _run(function, args: tuple):
+    from app.services.response_cache import record_worker_cache_stats
+
+    if MODEL_WORKERS <= 0:
+        return await anyio.to_thread.run_sync(partial(function, *args), limiter=_thread_limiter())
+
+    pool = get_model_pool()
+    profile = current_profile()
+    try:
+        result, changes, pid, cache_stats, samples = await asyncio.get_running_loop().run_in_executor(
+            pool, _call, function, args, profile.interval if profile is not None else None
+        )
+    except BrokenProcessPool:
+        traceback.print_exc()
+        _reset_pool(pool)
+        raise
+    merge_metrics(changes)
+    record_worker_cache_stats(pid, cache_stats)
+    if samples:
+        profile.merge(samples, f"model worker {pid}")
+    return result
+
+
+def _ping():
+    return os.getpid()
+
+
+def start_model_pool():
+    """Start every model worker and wait until each has loaded its data and models."""
+    if MODEL_WORKERS <= 0:
+        return
+    pool = get_model_pool()
+    for future in [pool.submit(_ping) for _ in range(MODEL_WORKERS)]:
+        future.result(timeout=WORKER_READY_TIMEOUT)
+    # Pings can all land on the first worker up, so also wait for each one's own signal
+    ready = set()
+    while len(ready) < MODEL_WORKERS:
+        ready.add(_ready.get(timeout=WORKER_READY_TIMEOUT))
+
+
+def stop_model_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def limits_status() -> dict:
+    """Occupancy of the model pool and each route's limit, for sizing MODEL_WORKERS."""
+    return {
+        "model_workers": MODEL_WORKERS,
+        "pool": _pool_limit.status(),
+        "routes": {name: limit.status() for name, limit in _route_limits.items()},
+    }
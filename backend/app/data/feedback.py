@@ -1,42 +1,70 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Header, HTTPException, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Literal
 
-from app.db import SessionLocal
-from app.data.feedback_model import Feedback
+from app.db import run_in_session
+from app.data.feedback_ingest import submit_matches
+from app.data.feedback_teams import find_matches, get_combination_record
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
+MAX_BATCH_MATCHES = 1000
+
 class FeedbackInput(BaseModel):
     team: list[str]
-    result: str  # "win" or "loss"
-    timestamp: str
+    result: Literal["win", "loss"]
+    timestamp: datetime
+    idempotency_key: str | None = None  # lets clients retry without double-counting
 
-@router.post("/feedback")
-def submit_feedback(data: FeedbackInput, db: Session = Depends(get_db)):
-    feedback_data = []
+class FeedbackBatchInput(BaseModel):
+    matches: list[FeedbackInput]
 
-    for name in data.team:
-        entry = Feedback(
-            name=name.title(),
-            result=data.result,
-            timestamp=datetime.fromisoformat(data.timestamp)
-        )
-        db.add(entry)
-        feedback_data.append(entry)
+def to_match(data: FeedbackInput, idempotency_key: str | None = None) -> dict:
+    return {
+        "team": data.team,
+        "result": data.result,
+        "timestamp": data.timestamp,
+        "idempotency_key": data.idempotency_key or idempotency_key,
+    }
 
-    db.commit()
+@router.post("/feedback")
+async def submit_feedback(data: FeedbackInput, idempotency_key: str | None = Header(None)):
+    summary = await run_in_session(submit_matches, [to_match(data, idempotency_key)])
 
     return {
         "message": "Feedback submitted successfully",
-        "entries": len(feedback_data)
+        "entries": summary["entries"],
+        "duplicate": summary["duplicates"] == 1,
+        "buffered": summary["buffered"]
     }
 
+@router.post("/feedback/batch")
+async def submit_feedback_batch(data: FeedbackBatchInput):
+    if len(data.matches) > MAX_BATCH_MATCHES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_MATCHES} matches per batch")
+
+    summary = await run_in_session(submit_matches, [to_match(match) for match in data.matches])
+    return dict(summary, message="Feedback submitted successfully")
+
+@router.get("/feedback/matches")
+async def feedback_matches(
+    names: str,
+    limit: int = Query(50, ge=0, le=500),
+    before_id: int | None = None,
+):
+    """
+    Win/loss record of every stored match with all of `names` (comma-separated)
+    on one team, and the most recent such matches. Page with `before_id`.
+    """
+    members = [name.strip() for name in names.split(",") if name.strip()]
+
+    def lookup(db: Session):
+        record = get_combination_record(db, members)
+        return dict(record, matches=find_matches(db, members, limit=limit, before_id=before_id))
+
+    try:
+        return await run_in_session(lookup)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
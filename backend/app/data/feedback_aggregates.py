@@ -0,0 +1,295 @@
+import argparse
+from datetime import date, datetime
+from itertools import combinations
+from sqlalchemy import func, insert, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db import session_scope
+from app.data.feedback_model import (
+    Feedback, FeedbackAggregate, FeedbackDaily, FeedbackMatch, FeedbackMatchMember, FeedbackPair, FeedbackTeam,
+    FeedbackTrio
+)
+from app.data.loader import normalize_name
+
+RESULT_COLUMNS = {"win": "wins", "loss": "losses"}
+
+# Rows per upsert statement, well under SQLite's limit on bound parameters
+UPSERT_CHUNK = 1000
+
+# Databases whose INSERT supports ON CONFLICT, which every feedback write relies on
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def team_members(names: list[str]) -> list[str]:
+    """Distinct normalized names of a team, sorted: the order pair/trio keys use."""
+    return sorted({normalize_name(name) for name in names})
+
+def roster_key(names: list[str]) -> str:
+    """Compact key identifying a team composition regardless of pick order."""
+    return "|".join(team_members(names))
+
+def count_combinations(teams, size: int) -> dict:
+    """
+    {sorted names: {"wins", "losses"}} over every `size`-Pokémon subset of
+    each (sorted members, result, number of matches) team; size None counts
+    whole teams.
+    """
+    totals = {}
+    for members, result, count in teams:
+        column = RESULT_COLUMNS.get(result)
+        if column is None:
+            continue
+        for combo in [tuple(members)] if size is None else combinations(members, size):
+            totals.setdefault(combo, {"wins": 0, "losses": 0})[column] += count
+    return totals
+
+def check_dialect(dialect: str):
+    if dialect not in UPSERT_DIALECTS:
+        raise RuntimeError(
+            f"DATABASE_URL uses {dialect}, but feedback storage needs INSERT ... ON CONFLICT: "
+            f"use one of {', '.join(UPSERT_DIALECTS)}"
+        )
+
+def insert_for(db: Session):
+    """Dialect-specific INSERT construct that supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    check_dialect(dialect)
+    return UPSERT_DIALECTS[dialect]
+
+def record_feedback(db: Session, names: list[str], result: str, timestamp: datetime = None):
+    """Add one match result for each name to the aggregate tables (caller commits)."""
+    record_feedback_batch(db, [(names, result, timestamp)])
+
+def record_feedback_batch(db: Session, matches: list[tuple[list[str], str, datetime]]):
+    """
+    Add many (names, result, timestamp) matches to the aggregate tables, one
+    upsert per table (caller commits). A missing timestamp counts as today.
+    """
+    totals = {}
+    daily = {}
+    teams = [(team_members(names), result, 1) for names, result, _ in matches]
+    for names, result, timestamp in matches:
+        column = RESULT_COLUMNS.get(result)
+        if column is None:
+            continue
+        day = (timestamp or datetime.now()).date()
+        for name in names:
+            name = normalize_name(name)
+            totals.setdefault(name, {"wins": 0, "losses": 0})[column] += 1
+            daily.setdefault((name, day), {"wins": 0, "losses": 0})[column] += 1
+
+    if not totals:
+        return
+
+    compositions = count_combinations(teams, None)
+    pairs = count_combinations(teams, 2)
+    trios = count_combinations(teams, 3)
+
+    upsert = insert_for(db)
+    for table, keys, rows in (
+        (FeedbackAggregate, [FeedbackAggregate.name], [{"name": name, **counts} for name, counts in totals.items()]),
+        (FeedbackDaily, [FeedbackDaily.name, FeedbackDaily.day],
+         [{"name": name, "day": day, **counts} for (name, day), counts in daily.items()]),
+        (FeedbackTeam, [FeedbackTeam.roster_key],
+         [{"roster_key": "|".join(members), **counts} for members, counts in compositions.items()]),
+        (FeedbackPair, [FeedbackPair.first, FeedbackPair.second],
+         [{"first": a, "second": b, **counts} for (a, b), counts in pairs.items()]),
+        (FeedbackTrio, [FeedbackTrio.first, FeedbackTrio.second, FeedbackTrio.third],
+         [{"first": a, "second": b, "third": c, **counts} for (a, b, c), counts in trios.items()]),
+    ):
+        for start in range(0, len(rows), UPSERT_CHUNK):
+            stmt = upsert(table).values(rows[start:start + UPSERT_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={"wins": table.wins + stmt.excluded.wins, "losses": table.losses + stmt.excluded.losses},
+            )
+            db.execute(stmt)
+
+def compute_raw_aggregates(db: Session) -> dict:
+    """Aggregate the raw feedback table in SQL: {name: (wins, losses)}."""
+    totals = {}
+    rows = (
+        db.query(Feedback.name, Feedback.result, func.count(Feedback.id))
+        .filter(Feedback.result.in_(list(RESULT_COLUMNS)))
+        .group_by(Feedback.name, Feedback.result)
+        .all()
+    )
+    for raw_name, result, count in rows:
+        name = normalize_name(raw_name)
+        wins, losses = totals.get(name, (0, 0))
+        if result == "win":
+            wins += count
+        else:
+            losses += count
+        totals[name] = (wins, losses)
+    return totals
+
+def compute_raw_daily(db: Session) -> dict:
+    """Aggregate the raw feedback table per day in SQL: {(name, day): (wins, losses)}."""
+    totals = {}
+    day = func.date(Feedback.timestamp)
+    rows = (
+        db.query(Feedback.name, day, Feedback.result, func.count(Feedback.id))
+        .filter(Feedback.result.in_(list(RESULT_COLUMNS)))
+        .group_by(Feedback.name, day, Feedback.result)
+        .all()
+    )
+    for raw_name, raw_day, result, count in rows:
+        # SQLite returns date() as text, PostgreSQL as a date
+        key = (normalize_name(raw_name), raw_day if isinstance(raw_day, date) else date.fromisoformat(raw_day))
+        wins, losses = totals.get(key, (0, 0))
+        if result == "win":
+            wins += count
+        else:
+            losses += count
+        totals[key] = (wins, losses)
+    return totals
+
+def rebuild_feedback_daily(db: Session):
+    """Recompute the per-day table from the raw feedback table (caller commits)."""
+    daily = compute_raw_daily(db)
+    db.query(FeedbackDaily).delete()
+    if daily:
+        db.execute(insert(FeedbackDaily), [
+            {"name": name, "day": day, "wins": wins, "losses": losses}
+            for (name, day), (wins, losses) in daily.items()
+        ])
+
+def compute_raw_combinations(db: Session) -> tuple[dict, dict, dict]:
+    """Team, pair and trio totals from the stored teams, grouped in SQL by composition first."""
+    rows = (
+        db.query(FeedbackMatch.roster_key, FeedbackMatch.result, func.count(FeedbackMatch.id))
+        .filter(FeedbackMatch.roster_key.isnot(None))
+        .group_by(FeedbackMatch.roster_key, FeedbackMatch.result)
+        .all()
+    )
+    teams = [(key.split("|"), result, count) for key, result, count in rows]
+    return count_combinations(teams, None), count_combinations(teams, 2), count_combinations(teams, 3)
+
+COMBINATION_TABLES = (FeedbackTeam, FeedbackPair, FeedbackTrio)
+
+def combination_row(table, combo: tuple, counts: dict) -> dict:
+    if table is FeedbackTeam:
+        return {"roster_key": "|".join(combo), **counts}
+    return dict(zip(["first", "second", "third"], combo), **counts)
+
+def combination_of(table, row) -> tuple:
+    if table is FeedbackTeam:
+        return tuple(row.roster_key.split("|"))
+    return tuple(getattr(row, column) for column in ["first", "second", "third"][:len(table.__table__.primary_key.columns)])
+
+def rebuild_feedback_teams(db: Session):
+    """Recompute the match member, team, pair and trio tables from the stored teams (caller commits)."""
+    db.query(FeedbackMatchMember).delete()
+    # In id ranges, so large tables aren't held in memory at once
+    last_id = 0
+    while True:
+        chunk = (
+            db.query(FeedbackMatch.id, FeedbackMatch.roster_key)
+            .filter(FeedbackMatch.id > last_id, FeedbackMatch.roster_key.isnot(None))
+            .order_by(FeedbackMatch.id)
+            .limit(UPSERT_CHUNK * 10)
+            .all()
+        )
+        if not chunk:
+            break
+        db.execute(insert(FeedbackMatchMember), [
+            {"name": name, "match_id": match_id} for match_id, key in chunk for name in key.split("|")
+        ])
+        last_id = chunk[-1][0]
+
+    for table, combos in zip(COMBINATION_TABLES, compute_raw_combinations(db)):
+        db.query(table).delete()
+        if combos:
+            db.execute(insert(table), [combination_row(table, combo, counts) for combo, counts in combos.items()])
+
+def rebuild_feedback_aggregates(db: Session) -> int:
+    """Recompute the aggregate tables from scratch from the raw feedback and match tables."""
+    totals = compute_raw_aggregates(db)
+    db.query(FeedbackAggregate).delete()
+    db.add_all(
+        FeedbackAggregate(name=name, wins=wins, losses=losses)
+        for name, (wins, losses) in totals.items()
+    )
+    rebuild_feedback_daily(db)
+    rebuild_feedback_teams(db)
+    db.commit()
+    return len(totals)
+
+def _mismatches(expected: dict, actual: dict) -> dict:
+    return {
+        key: {"expected": expected.get(key, (0, 0)), "actual": actual.get(key, (0, 0))}
+        for key in set(expected) | set(actual)
+        if expected.get(key, (0, 0)) != actual.get(key, (0, 0))
+    }
+
+def check_feedback_aggregates(db: Session) -> dict:
+    """Compare the aggregate tables with the raw feedback and match tables; returns mismatches."""
+    totals = {
+        row.name: (row.wins, row.losses)
+        for row in db.query(FeedbackAggregate).all()
+        if row.wins or row.losses
+    }
+    daily = {
+        (row.name, row.day): (row.wins, row.losses)
+        for row in db.query(FeedbackDaily).all()
+        if row.wins or row.losses
+    }
+    mismatches = _mismatches(compute_raw_aggregates(db), totals)
+    mismatches.update(
+        (f"{name} {day}", diff) for (name, day), diff in _mismatches(compute_raw_daily(db), daily).items()
+    )
+
+    for table, expected in zip(COMBINATION_TABLES, compute_raw_combinations(db)):
+        actual = {
+            combination_of(table, row): (row.wins, row.losses)
+            for row in db.query(table).all()
+            if row.wins or row.losses
+        }
+        expected = {combo: (counts["wins"], counts["losses"]) for combo, counts in expected.items()}
+        mismatches.update((" + ".join(combo), diff) for combo, diff in _mismatches(expected, actual).items())
+    return mismatches
+
+def ensure_feedback_schema(engine):
+    """
+    Create the tables, columns and indexes added since a database was first
+    created. Raises RuntimeError at startup for a database feedback writes can't use.
+    """
+    check_dialect(engine.dialect.name)
+    for table in (FeedbackAggregate, FeedbackDaily, FeedbackMatch, FeedbackMatchMember) + COMBINATION_TABLES:
+        table.__table__.create(bind=engine, checkfirst=True)
+
+    if "roster_key" not in {column["name"] for column in inspect(engine).get_columns("feedback_match")}:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE feedback_match ADD COLUMN roster_key VARCHAR"))
+
+    for table in (Feedback, FeedbackMatch):
+        for index in table.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # Databases upgraded from before `feedback_daily` have totals but no days yet
+    with Session(bind=engine) as db:
+        if db.query(FeedbackDaily).first() is None and db.query(FeedbackAggregate).first() is not None:
+            print("Backfilling feedback_daily from the raw feedback table")
+            rebuild_feedback_daily(db)
+            db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the feedback aggregate tables.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    from app.db import engine
+    ensure_feedback_schema(engine)
+
+    with session_scope() as db:
+        if args.command == "rebuild":
+            count = rebuild_feedback_aggregates(db)
+            print(f"✅ Rebuilt feedback aggregates for {count} Pokémon.")
+        else:
+            mismatches = check_feedback_aggregates(db)
+            if mismatches:
+                for name, diff in sorted(mismatches.items()):
+                    print(f"{name}: expected {diff['expected']}, found {diff['actual']}")
+                raise SystemExit(1)
+            print("✅ Feedback aggregates match the raw feedback table.")
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+import traceback
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db import session_scope
+from app.metrics import timed_stage
+from app.data.feedback_model import Feedback, FeedbackMatch, FeedbackMatchMember
+from app.data.feedback_aggregates import insert_for, record_feedback_batch, roster_key, team_members
+
+# Optional write buffer: 0 disables it (every request writes synchronously).
+# With it on, accepted matches wait in memory until FEEDBACK_BUFFER_SIZE are
+# pending (the request that gets there writes them) or FEEDBACK_FLUSH_SECONDS
+# pass. At most FEEDBACK_BUFFER_MAX_PENDING matches are ever held, counting a
+# flush in progress; past that, writes get a 503 until the database catches up.
+# A crash therefore loses at most FEEDBACK_BUFFER_MAX_PENDING matches. A batch
+# that fails FEEDBACK_FLUSH_RETRIES flushes in a row is logged and dropped.
+FEEDBACK_BUFFER_SIZE = int(os.getenv("FEEDBACK_BUFFER_SIZE", "0"))
+FEEDBACK_FLUSH_SECONDS = float(os.getenv("FEEDBACK_FLUSH_SECONDS", "1.0"))
+FEEDBACK_BUFFER_MAX_PENDING = int(os.getenv("FEEDBACK_BUFFER_MAX_PENDING", str(10 * FEEDBACK_BUFFER_SIZE)))
+FEEDBACK_FLUSH_RETRIES = int(os.getenv("FEEDBACK_FLUSH_RETRIES", "3"))
+
+
+@timed_stage("db_write")
+def ingest_matches(db: Session, matches: list[dict]) -> dict:
+    """
+    Write many match results in one transaction with one statement per table.
+
+    Each match is {"team", "result", "timestamp", "idempotency_key"}. The team
+    is stored once on its match row and indexed through its members; matches
+    whose idempotency key was already recorded are skipped.
+    """
+    # Drop repeated keys within the batch itself
+    seen = set()
+    unique = []
+    for match in matches:
+        key = match.get("idempotency_key")
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(match)
+
+    def match_row(m):
+        return {
+            "idempotency_key": m.get("idempotency_key"),
+            "result": m["result"],
+            "timestamp": m["timestamp"],
+            "roster_key": roster_key(m["team"]),
+        }
+
+    accepted = [m for m in unique if m.get("idempotency_key") is None]
+    keyed = [m for m in unique if m.get("idempotency_key") is not None]
+    match_ids = []
+
+    if accepted:
+        stmt = insert(FeedbackMatch).returning(FeedbackMatch.id, sort_by_parameter_order=True)
+        match_ids = list(db.execute(stmt, [match_row(m) for m in accepted]).scalars())
+
+    if keyed:
+        stmt = insert_for(db)(FeedbackMatch).values([match_row(m) for m in keyed])
+        stmt = stmt.on_conflict_do_nothing(index_elements=[FeedbackMatch.idempotency_key])
+        new_ids = dict(db.execute(stmt.returning(FeedbackMatch.idempotency_key, FeedbackMatch.id)).all())
+        new_keyed = [m for m in keyed if m["idempotency_key"] in new_ids]
+        accepted += new_keyed
+        match_ids += [new_ids[m["idempotency_key"]] for m in new_keyed]
+
+    members = [
+        {"name": name, "match_id": match_id}
+        for m, match_id in zip(accepted, match_ids)
+        for name in team_members(m["team"])
+    ]
+    if members:
+        db.execute(insert(FeedbackMatchMember), members)
+
+    rows = [
+        {"name": name.title(), "result": m["result"], "timestamp": m["timestamp"]}
+        for m in accepted
+        for name in m["team"]
+    ]
+    if rows:
+        db.execute(insert(Feedback), rows)
+
+    # Keep the per-Pokémon totals in the same transaction as the raw rows
+    record_feedback_batch(db, [(m["team"], m["result"], m["timestamp"]) for m in accepted])
+    db.commit()
+
+    return {
+        "matches": len(accepted),
+        "duplicates": len(matches) - len(accepted),
+        "entries": len(rows),
+    }
+
+
+class FeedbackBuffer:
+    """In-memory queue of matches flushed to the database on size or time, holding at most max_pending."""
+
+    def __init__(self, max_size: int, flush_seconds: float, max_pending: int, max_retries: int):
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max(max_pending, max_size)
+        self.max_retries = max_retries
+        self.dropped = 0
+        self._pending = []
+        self._in_flight = 0
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def add(self, matches: list[dict]):
+        with self._lock:
+            if len(self._pending) + self._in_flight + len(matches) > self.max_pending:
+                # The database is falling behind: push back instead of holding more than we can lose
+                raise HTTPException(status_code=503, detail="Feedback buffer is full, retry shortly",
+                                    headers={"Retry-After": "1"})
+            self._pending.extend(matches)
+            size = len(self._pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        if size >= self.max_size and not self._failures:
+            # While flushes are failing only the background thread retries, on its timer
+            self.flush()
+
+    def flush(self):
+        """Write everything pending; safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._in_flight = len(pending)
+            if not pending:
+                return
+            try:
+                with session_scope() as db:
+                    ingest_matches(db, pending)
+                self._failures = 0
+            except Exception:
+                traceback.print_exc()
+                self._failures += 1
+                if self._failures >= self.max_retries:
+                    # Likely a bad row or a long outage: give up on this batch rather than block every later one
+                    self._failures = 0
+                    self.dropped += len(pending)
+                    print(f"⚠️ Dropped {len(pending)} buffered feedback matches after {self.max_retries} failed flushes")
+                else:
+                    # Put them back so the next flush retries
+                    with self._lock:
+                        self._pending[:0] = pending
+            finally:
+                with self._lock:
+                    self._in_flight = 0
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+
+_buffer = FeedbackBuffer(
+    FEEDBACK_BUFFER_SIZE, FEEDBACK_FLUSH_SECONDS, FEEDBACK_BUFFER_MAX_PENDING, FEEDBACK_FLUSH_RETRIES
+) if FEEDBACK_BUFFER_SIZE > 0 else None
+
+
+def submit_matches(db: Session, matches: list[dict]) -> dict:
+    """Write matches now, or hand them to the write buffer when it is enabled."""
+    if _buffer is None or len(matches) >= FEEDBACK_BUFFER_SIZE:
+        # A batch that large gains nothing from waiting for others
+        return dict(ingest_matches(db, matches), buffered=False)
+    _buffer.add(matches)
+    return {"matches": len(matches), "duplicates": None, "entries": sum(len(m["team"]) for m in matches), "buffered": True}
+
+
+def flush_feedback_buffer():
+    if _buffer is not None:
+        _buffer.flush()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Date, Index, Integer, String, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -10,3 +10,69 @@ class Feedback(Base):
     name = Column(String, nullable=False)
     result = Column(String, nullable=False)
     timestamp = Column(DateTime, nullable=False)
+
+    # Serves per-Pokémon time-range queries (rebuilding `feedback_daily`, ad-hoc windows)
+    __table_args__ = (Index("ix_feedback_name_timestamp", "name", "timestamp"),)
+
+class FeedbackAggregate(Base):
+    """Per-Pokémon win/loss totals, maintained alongside every `feedback` insert."""
+    __tablename__ = "feedback_aggregate"
+
+    name = Column(String, primary_key=True)  # normalized, e.g. "Alolan Raichu"
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
+class FeedbackDaily(Base):
+    """Per-Pokémon win/loss totals for each day, for recency-weighted win rates."""
+    __tablename__ = "feedback_daily"
+
+    name = Column(String, primary_key=True)  # normalized, like FeedbackAggregate.name
+    day = Column(Date, primary_key=True)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
+class FeedbackMatch(Base):
+    """One submitted match; `idempotency_key` lets clients retry without double-counting."""
+    __tablename__ = "feedback_match"
+
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String, unique=True, nullable=True)
+    result = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    # The team, stored once: sorted normalized names joined by "|". NULL for
+    # matches recorded before teams were kept.
+    roster_key = Column(String, nullable=True, index=True)
+
+class FeedbackMatchMember(Base):
+    """One row per Pokémon in a stored match; the (name, match_id) key finds a Pokémon's matches."""
+    __tablename__ = "feedback_match_member"
+
+    name = Column(String, primary_key=True)  # normalized
+    match_id = Column(Integer, primary_key=True)
+
+class FeedbackTeam(Base):
+    """Win/loss totals per team composition (FeedbackMatch.roster_key)."""
+    __tablename__ = "feedback_team"
+
+    roster_key = Column(String, primary_key=True)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
+class FeedbackPair(Base):
+    """Win/loss totals for two Pokémon on the same team; names are normalized with first < second."""
+    __tablename__ = "feedback_pair"
+
+    first = Column(String, primary_key=True)
+    second = Column(String, primary_key=True)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+
+class FeedbackTrio(Base):
+    """Win/loss totals for three Pokémon on the same team, names in sorted order."""
+    __tablename__ = "feedback_trio"
+
+    first = Column(String, primary_key=True)
+    second = Column(String, primary_key=True)
+    third = Column(String, primary_key=True)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
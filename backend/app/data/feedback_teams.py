@@ -0,0 +1,83 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+
+from app.data.feedback_aggregates import team_members
+from app.data.feedback_model import FeedbackAggregate, FeedbackMatch, FeedbackMatchMember, FeedbackPair, FeedbackTeam, FeedbackTrio
+
+MAX_QUERY_NAMES = 5
+
+
+def _matches_with(db: Session, members: list[str]):
+    """Query over stored matches containing every name: one primary-key join per name."""
+    query = db.query(FeedbackMatch)
+    for name in members:
+        member = aliased(FeedbackMatchMember)
+        query = query.join(member, (member.match_id == FeedbackMatch.id) & (member.name == name))
+    return query
+
+
+def get_combination_record(db: Session, names: list[str]) -> dict:
+    """
+    Wins and losses of every stored match whose team contains all `names`.
+
+    One to three names read a maintained totals row; larger sets join the
+    member index. Matches stored before teams were kept only count for single names.
+    """
+    members = team_members(names)
+    if not members or len(members) > MAX_QUERY_NAMES:
+        raise ValueError(f"Give 1 to {MAX_QUERY_NAMES} distinct Pokémon")
+
+    if len(members) == 1:
+        row = db.get(FeedbackAggregate, members[0])
+    elif len(members) == 2:
+        row = db.get(FeedbackPair, tuple(members))
+    elif len(members) == 3:
+        row = db.get(FeedbackTrio, tuple(members))
+    else:
+        counts = dict(
+            _matches_with(db, members)
+            .with_entities(FeedbackMatch.result, func.count(FeedbackMatch.id))
+            .group_by(FeedbackMatch.result)
+            .all()
+        )
+        return {"names": members, "wins": counts.get("win", 0), "losses": counts.get("loss", 0)}
+
+    return {"names": members, "wins": row.wins if row else 0, "losses": row.losses if row else 0}
+
+
+def find_matches(db: Session, names: list[str], limit: int = 50, before_id: int = None) -> list[dict]:
+    """Most recent stored matches whose team contains all `names`, newest first."""
+    members = team_members(names)
+    if not members or len(members) > MAX_QUERY_NAMES:
+        raise ValueError(f"Give 1 to {MAX_QUERY_NAMES} distinct Pokémon")
+
+    query = _matches_with(db, members)
+    if before_id is not None:
+        query = query.filter(FeedbackMatch.id < before_id)
+    return [
+        {
+            "id": match.id,
+            "team": match.roster_key.split("|"),
+            "result": match.result,
+            "timestamp": match.timestamp.isoformat(),
+        }
+        for match in query.order_by(FeedbackMatch.id.desc()).limit(limit)
+    ]
+
+
+def get_pair_counts(db: Session) -> list[tuple]:
+    """Every (first, second, wins, losses) pair total; at most n*(n-1)/2 rows."""
+    return db.query(FeedbackPair.first, FeedbackPair.second, FeedbackPair.wins, FeedbackPair.losses).all()
+
+
+def get_team_records(db: Session, min_games: int, limit: int) -> list[tuple]:
+    """(members, wins, losses) of the `limit` most played compositions with at least `min_games` matches."""
+    games = FeedbackTeam.wins + FeedbackTeam.losses
+    rows = (
+        db.query(FeedbackTeam.roster_key, FeedbackTeam.wins, FeedbackTeam.losses)
+        .filter(games >= min_games)
+        .order_by(games.desc())
+        .limit(limit)
+        .all()
+    )
+    return [(key.split("|"), wins, losses) for key, wins, losses in rows]
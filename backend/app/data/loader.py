@@ -1,59 +1,230 @@
 import pandas as pd
 import os
-from app.db import SessionLocal
-from app.data.feedback_model import Feedback
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache, wraps
+from sqlalchemy import String, func, select, type_coerce
+from app.db import session_scope
+from app.metrics import stage, timed_stage
+from app.data.feedback_model import Feedback, FeedbackAggregate, FeedbackDaily
 
 DIRECTORY = os.path.dirname(os.path.abspath(__file__))
 FILE = os.path.join(DIRECTORY, "PokemonUniteData.csv")
 META_FILE = os.path.join(DIRECTORY, "uniteapi_metadata.csv")
 
+# How player feedback is weighted by age: "all" counts every match fully,
+# "window" only the last FEEDBACK_WINDOW_DAYS days, and "decay" halves a
+# match's weight every FEEDBACK_HALF_LIFE_DAYS days.
+FEEDBACK_WEIGHTING = os.getenv("FEEDBACK_WEIGHTING", "all").lower()
+FEEDBACK_WINDOW_DAYS = int(os.getenv("FEEDBACK_WINDOW_DAYS", "30"))
+FEEDBACK_HALF_LIFE_DAYS = float(os.getenv("FEEDBACK_HALF_LIFE_DAYS", "14"))
+# Days more than this many half-lives old weigh under 0.1% and aren't read
+DECAY_HORIZON_HALF_LIVES = 10
+
+# Share of player feedback in the blended win rate (the rest is UniteAPI data),
+# and the boost per net weighted win, capped at ±FEEDBACK_BOOST_CAP net wins
+FEEDBACK_BLEND_WEIGHT = float(os.getenv("FEEDBACK_BLEND_WEIGHT", "0.3"))
+FEEDBACK_BOOST_CAP = int(os.getenv("FEEDBACK_BOOST_CAP", "30"))
+FEEDBACK_BOOST_PER_WIN = float(os.getenv("FEEDBACK_BOOST_PER_WIN", "0.01"))
+
+# A snapshot younger than this is served without checking its inputs, so a
+# burst of feedback writes causes at most one rebuild per interval. New
+# feedback therefore shows up in predictions within this many seconds.
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "5"))
+
+if FEEDBACK_WEIGHTING not in ("all", "window", "decay"):
+    raise ValueError(f"FEEDBACK_WEIGHTING must be all, window or decay, not {FEEDBACK_WEIGHTING!r}")
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """
+    Process-wide result of one full `load_data` build. Its frames are shared
+    by every request and must be treated as read-only; `load_data` hands out copies.
+    """
+    key: tuple
+    version: str
+    final_df: pd.DataFrame
+    merged_df: pd.DataFrame
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_snapshot_checked_at = 0.0  # time.monotonic() of the last build or input check
+
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     # Converts "alolan-raichu" or "Alolan Raichu" to "Alolan Raichu"
     return ' '.join(word.capitalize() for word in name.replace("-", " ").split())
 
+def get_weighted_feedback(db, weighting: str, today: date) -> pd.DataFrame:
+    """
+    Recency-weighted wins and losses per Pokémon from the `feedback_daily` table.
+
+    Reads at most one row per Pokémon per day in the window (or decay horizon),
+    so the cost depends on the roster size and window, not on feedback volume.
+    """
+    if weighting == "window":
+        cutoff = today - timedelta(days=FEEDBACK_WINDOW_DAYS)
+        rows = (
+            db.query(FeedbackDaily.name, func.sum(FeedbackDaily.wins), func.sum(FeedbackDaily.losses))
+            .filter(FeedbackDaily.day > cutoff)
+            .group_by(FeedbackDaily.name)
+            .all()
+        )
+        return pd.DataFrame(rows, columns=["Name", "WeightedWin", "WeightedLoss"])
+
+    # SQLite has no pow(), so the per-day rows are weighted here. They are read
+    # through Core with the day untyped: ORM rows and date parsing cost more than the query.
+    cutoff = today - timedelta(days=int(FEEDBACK_HALF_LIFE_DAYS * DECAY_HORIZON_HALF_LIVES))
+    rows = db.connection().execute(
+        select(FeedbackDaily.name, type_coerce(FeedbackDaily.day, String), FeedbackDaily.wins, FeedbackDaily.losses)
+        .where(FeedbackDaily.day > cutoff)
+    ).all()
+    daily = pd.DataFrame(rows, columns=["Name", "Day", "Win", "Loss"])
+    # Future-dated matches (client clocks) count fully rather than more than fully
+    age = (pd.Timestamp(today) - pd.to_datetime(daily["Day"])).dt.days.clip(lower=0)
+    weight = 0.5 ** (age / FEEDBACK_HALF_LIFE_DAYS)
+    return (
+        pd.DataFrame({"Name": daily["Name"], "WeightedWin": daily["Win"] * weight, "WeightedLoss": daily["Loss"] * weight})
+        .groupby("Name", as_index=False)
+        .sum()
+    )
+
 # Feedback Data Aggregate (PostgreSQL version)
-def get_feedback_aggregates():
-    db = SessionLocal()
-    try:
-        feedback_entries = db.query(Feedback).all()
-        if not feedback_entries:
+@timed_stage("db_aggregate")
+def get_feedback_aggregates(weighting: str = None, today: date = None):
+    """
+    Read the maintained per-Pokémon totals (one row per Pokémon): all-time
+    Win/Loss, plus WeightedWin/WeightedLoss under the feedback weighting and
+    the AdjustedWinRate computed from them.
+    """
+    weighting = weighting or FEEDBACK_WEIGHTING
+    with session_scope() as db:
+        rows = db.query(FeedbackAggregate).all()
+        if not rows:
             return None
 
-        feedback_df = pd.DataFrame([
-            {"Name": normalize_name(fb.name), "Result": fb.result}
-            for fb in feedback_entries
-        ])
-
-        feedback_agg = (
-            feedback_df.pivot_table(index="Name", columns="Result", aggfunc="size", fill_value=0)
-            .reset_index()
-            .rename(columns={"win": "Win", "loss": "Loss"})
+        feedback_agg = pd.DataFrame(
+            [(row.name, row.losses, row.wins) for row in rows],
+            columns=["Name", "Loss", "Win"],
         )
+        if weighting == "all":
+            feedback_agg["WeightedWin"] = feedback_agg["Win"]
+            feedback_agg["WeightedLoss"] = feedback_agg["Loss"]
+        else:
+            weighted = get_weighted_feedback(db, weighting, today or date.today())
+            feedback_agg = feedback_agg.merge(weighted, on="Name", how="left")
+            feedback_agg[["WeightedWin", "WeightedLoss"]] = feedback_agg[["WeightedWin", "WeightedLoss"]].fillna(0)
 
-        feedback_agg["Win"] = feedback_agg.get("Win", 0)
-        feedback_agg["Loss"] = feedback_agg.get("Loss", 0)
+    # No weighted feedback leaves the rate empty, so blending falls back to the UniteAPI rate
+    weighted_total = feedback_agg["WeightedWin"] + feedback_agg["WeightedLoss"]
+    feedback_agg["AdjustedWinRate"] = (
+        feedback_agg["WeightedWin"] / weighted_total
+    ).where(weighted_total > 0).round(2)
 
-        feedback_agg["AdjustedWinRate"] = (
-            feedback_agg["Win"] / (feedback_agg["Win"] + feedback_agg["Loss"])
-        ).fillna(0).round(2)
+    return feedback_agg
 
-        return feedback_agg
-    finally:
-        db.close()
+@timed_stage("snapshot_check")
+def get_feedback_watermark():
+    """Return the feedback high-water mark; changes whenever feedback is written.
+
+    Max id comes from the primary-key index and the totals from the ~75-row
+    aggregate table, so neither scans the raw feedback table.
+    """
+    with session_scope() as db:
+        max_id = db.query(func.max(Feedback.id)).scalar()
+        wins, losses = db.query(
+            func.sum(FeedbackAggregate.wins), func.sum(FeedbackAggregate.losses)
+        ).one()
+        return (max_id or 0, wins or 0, losses or 0)
+
+def get_snapshot_key():
+    """Cheap fingerprint of every input `build_frames` reads."""
+    return (
+        os.path.getmtime(FILE),
+        os.path.getmtime(META_FILE),
+        get_feedback_watermark(),
+        # Recency weights change with the date even when no feedback arrives
+        None if FEEDBACK_WEIGHTING == "all" else date.today().isoformat(),
+    )
+
+def get_snapshot():
+    """
+    Return the current dataset snapshot, rebuilding it only when its inputs
+    changed. Inputs are checked at most every SNAPSHOT_REFRESH_SECONDS.
+    """
+    global _snapshot, _snapshot_checked_at
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _snapshot_checked_at < SNAPSHOT_REFRESH_SECONDS:
+        return snapshot
+
+    key = get_snapshot_key()
+    if snapshot is not None and snapshot.key == key:
+        _snapshot_checked_at = time.monotonic()
+        return snapshot
+
+    with _snapshot_lock:
+        # Another request may have rebuilt it while we waited for the lock
+        if _snapshot is not None and _snapshot.key == key:
+            return _snapshot
+
+        with stage("load_data"):
+            final_df, merged_df = build_frames()
+        version = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+        _snapshot = DatasetSnapshot(key=key, version=version, final_df=final_df, merged_df=merged_df)
+        _snapshot_checked_at = time.monotonic()
+        return _snapshot
+
+def invalidate_snapshot():
+    """Drop the cached snapshot so the next `get_snapshot` rebuilds it from the current inputs."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+def per_snapshot(build):
+    """Memoize `build(snapshot)` for the most recent snapshot version it was called with."""
+    lock = threading.Lock()
+    latest = [None, None]  # [version, value]
+
+    @wraps(build)
+    def wrapper(snapshot):
+        version, value = latest
+        if version == snapshot.version:
+            return value
+        with lock:
+            if latest[0] != snapshot.version:
+                latest[:] = [snapshot.version, build(snapshot)]
+            return latest[1]
+
+    return wrapper
 
 def load_data():
+    """Return (final_df, merged_df) copies of the current dataset snapshot.
+
+    The frames are deep copies (about a hundred rows each), so callers may add
+    columns or modify values freely without affecting the shared snapshot.
+    """
+    snapshot = get_snapshot()
+    return snapshot.final_df.copy(), snapshot.merged_df.copy()
+
+def build_frames():
     """Loads and returns cleaned, merged Pokémon Unite data with feedback boost logic."""
 
     # Load raw CSVs
-    base_df = pd.read_csv(FILE)
-    meta_df = pd.read_csv(META_FILE)
+    with stage("csv_read"):
+        base_df = pd.read_csv(FILE)
+        meta_df = pd.read_csv(META_FILE)
 
     # Convert WinRate from percentage to decimal (e.g., 52.8% -> 0.528)
     meta_df["WinRate"] = meta_df["WinRate"] / 100.0
 
     # Normalize names for matching
-    base_df["Name"] = base_df["Name"].apply(normalize_name)
-    meta_df["Name"] = meta_df["Name"].apply(normalize_name)
+    base_df["Name"] = base_df["Name"].map(normalize_name)
+    meta_df["Name"] = meta_df["Name"].map(normalize_name)
 
     # Drop any conflicting or duplicate columns from base data
     base_df_cleaned = base_df.drop(columns=["UsageDifficulty", "Role", "Ranged_or_Melee"], errors="ignore")
@@ -68,10 +239,10 @@ def load_data():
         # Inject raw WinRate for blending
         feedback_agg = feedback_agg.merge(meta_df[["Name", "WinRate"]], on="Name", how="left")
         
-        # BlendedWinRate: 70% API data, 30% player feedback
+        # BlendedWinRate: 70% API data, 30% player feedback by default
         feedback_agg["BlendedWinRate"] = (
-            0.7 * feedback_agg["WinRate"] +
-            0.3 * feedback_agg["AdjustedWinRate"]
+            (1 - FEEDBACK_BLEND_WEIGHT) * feedback_agg["WinRate"] +
+            FEEDBACK_BLEND_WEIGHT * feedback_agg["AdjustedWinRate"]
         ).round(2)
         
         # Merge into main data
@@ -90,6 +261,8 @@ def load_data():
         merged_df["AdjustedWinRate"] = merged_df["WinRate"]
         merged_df["Win"] = 0
         merged_df["Loss"] = 0
+        merged_df["WeightedWin"] = 0
+        merged_df["WeightedLoss"] = 0
 
     # Drop columns we don’t need for modeling or display
     merged_df.drop(columns=["Description"], inplace=True, errors="ignore")
@@ -125,11 +298,13 @@ def load_data():
     lane_counts = pd.get_dummies(merged_df["PreferredLane"], prefix="Lane")
     merged_df = pd.concat([merged_df, lane_counts], axis=1)
 
-    # Feedback Boost Logic — Net Wins scaled and clipped to ±30
-    feedback_net = (merged_df["Win"] - merged_df["Loss"]).fillna(0).clip(-30, 30)
+    # Feedback Boost Logic — weighted Net Wins scaled and clipped to ±FEEDBACK_BOOST_CAP
+    feedback_net = (merged_df["WeightedWin"] - merged_df["WeightedLoss"]).fillna(0).clip(-FEEDBACK_BOOST_CAP, FEEDBACK_BOOST_CAP)
     merged_df["FeedbackBoostedWinRate"] = (
-        merged_df["AdjustedWinRate"] + (feedback_net * 0.01)
+        merged_df["AdjustedWinRate"] + (feedback_net * FEEDBACK_BOOST_PER_WIN)
     ).clip(0, 1)
+    # Only needed for the boost; keep them out of the model features
+    merged_df.drop(columns=["WeightedWin", "WeightedLoss"], inplace=True)
 
     # Sort for consistency
     merged_df.sort_values("Name", inplace=True)
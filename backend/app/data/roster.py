@@ -0,0 +1,108 @@
+import re
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+from app.data.loader import normalize_name, per_snapshot
+
+# Text columns of merged_df kept as integer codes into a per-snapshot category list
+CATEGORICAL_COLUMNS = ["Role", "PreferredLane", "Tier", "Style"]
+
+
+def alias_key(name: str) -> str:
+    """Lookup key shared by every spelling of a name: "alolan-raichu", "Alolan Raichu", "ALOLAN_RAICHU"."""
+    return re.sub(r"[^0-9a-z]", "", str(name).lower())
+
+
+@dataclass(frozen=True)
+class RosterIndex:
+    """
+    Compact, read-only roster for one dataset snapshot: name -> row lookup,
+    row-aligned float32 numeric features and integer codes for the text columns.
+    Request handlers score against this instead of the snapshot DataFrames.
+    """
+    snapshot_version: str
+    names: list                # canonical names, in snapshot row order
+    positions: dict            # alias key -> row position
+    feature_columns: list      # columns of final_df, in order
+    features: np.ndarray       # float32 (n, len(feature_columns)), C-contiguous; NaN where final_df is missing
+    column_positions: dict     # feature column -> column position
+    codes: dict                # CATEGORICAL_COLUMNS -> int16 (n,) codes into categories
+    categories: dict           # CATEGORICAL_COLUMNS -> tuple of distinct values, in first-seen order
+
+    def position(self, name: str):
+        return self.positions.get(alias_key(name))
+
+    def lookup(self, team_list: list[str]):
+        """
+        Resolve names in the order given.
+
+        Returns (names, rows, unknown): canonical names (or the normalized input
+        when unknown), row positions (None when unknown) and the unknown names.
+        """
+        names, rows, unknown = [], [], []
+        for requested in team_list:
+            row = self.position(requested)
+            if row is None:
+                name = normalize_name(requested)
+                unknown.append(name)
+            else:
+                name = self.names[row]
+            names.append(name)
+            rows.append(row)
+        return names, rows, unknown
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one numeric feature column."""
+        return self.features[:, self.column_positions[name]]
+
+    def labels(self, column: str) -> list:
+        """Per-row values of a categorical column."""
+        categories = self.categories[column]
+        return [categories[code] for code in self.codes[column]]
+
+    def code_of(self, column: str, value) -> int:
+        """Code of `value` in a categorical column, or -1 when no row has it."""
+        categories = self.categories[column]
+        return categories.index(value) if value in categories else -1
+
+    def feature_rows(self, rows: list[int], columns: list[str]) -> np.ndarray:
+        """Feature matrix for the given rows and columns; columns absent from the snapshot are 0."""
+        matrix = np.zeros((len(rows), len(columns)), dtype=np.float32)
+        present = [(j, self.column_positions[col]) for j, col in enumerate(columns) if col in self.column_positions]
+        if present and rows:
+            target, source = zip(*present)
+            matrix[:, list(target)] = self.features[np.ix_(rows, list(source))]
+        return matrix
+
+
+@per_snapshot
+def get_roster_index(snapshot) -> RosterIndex:
+    """Build (once per snapshot) the roster index for the snapshot's rows."""
+    final_df, merged_df = snapshot.final_df, snapshot.merged_df
+    names = merged_df["Name"].astype(str).tolist()
+    positions = {}
+    for row, name in enumerate(names):
+        positions.setdefault(alias_key(name), row)
+
+    features = np.ascontiguousarray(final_df.to_numpy(dtype=np.float32, na_value=np.nan))
+    features.flags.writeable = False
+
+    codes, categories = {}, {}
+    for column in CATEGORICAL_COLUMNS:
+        column_codes, uniques = pd.factorize(merged_df[column])
+        column_codes = column_codes.astype(np.int16)
+        column_codes.flags.writeable = False
+        codes[column], categories[column] = column_codes, tuple(uniques)
+
+    feature_columns = final_df.columns.tolist()
+    return RosterIndex(
+        snapshot_version=snapshot.version,
+        names=names,
+        positions=positions,
+        feature_columns=feature_columns,
+        features=features,
+        column_positions={col: j for j, col in enumerate(feature_columns)},
+        codes=codes,
+        categories=categories,
+    )
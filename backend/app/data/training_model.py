@@ -0,0 +1,74 @@
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+
+from app.data.feedback_model import Base
+
+class TrainingRun(Base):
+    """One `build_model` run; details live in the tables below, one row per name."""
+    __tablename__ = "training_run"
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String, unique=True, nullable=False)     # also names the run's charts and archived artifacts
+    model = Column(String, nullable=False)
+    tuned = Column(Boolean, nullable=False, default=False)
+    search = Column(String, nullable=True)                   # search strategy when tuned
+    artifact_version = Column(String, nullable=True)         # registry version of the artifacts it produced
+    created_at = Column(DateTime, nullable=False)
+
+class TrainingParam(Base):
+    __tablename__ = "training_param"
+
+    run = Column(Integer, ForeignKey("training_run.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+    value = Column(String, nullable=True)                    # JSON-encoded
+
+class TrainingMetric(Base):
+    __tablename__ = "training_metric"
+
+    run = Column(Integer, ForeignKey("training_run.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
+    value = Column(Float, nullable=True)
+
+class TrainingFeatureImportance(Base):
+    __tablename__ = "training_feature_importance"
+
+    run = Column(Integer, ForeignKey("training_run.id", ondelete="CASCADE"), primary_key=True)
+    feature = Column(String, primary_key=True)
+    importance = Column(Float, nullable=False)
+
+class TrainingPhase(Base):
+    """Wall-clock seconds spent in one phase of a run (load, smote, fit, eval, save)."""
+    __tablename__ = "training_phase"
+
+    run = Column(Integer, ForeignKey("training_run.id", ondelete="CASCADE"), primary_key=True)
+    phase = Column(String, primary_key=True)
+    seconds = Column(Float, nullable=False)
+
+class TrainingTrial(Base):
+    """One hyperparameter-search candidate of a tuned run, in cv_results_ order."""
+    __tablename__ = "training_trial"
+
+    run = Column(Integer, ForeignKey("training_run.id", ondelete="CASCADE"), primary_key=True)
+    trial = Column(Integer, primary_key=True)
+    iteration = Column(Integer, nullable=False, default=0)   # successive-halving round; 0 otherwise
+    resources = Column(Integer, nullable=True)               # samples per fit in that round (halving only)
+    params = Column(Text, nullable=False)                    # JSON-encoded candidate params
+    mean_fit_time = Column(Float, nullable=True)
+    mean_score_time = Column(Float, nullable=True)
+    mean_test_score = Column(Float, nullable=True)
+    rank = Column(Integer, nullable=True)
+
+class TrainingJob(Base):
+    """A queued, running or finished training job, visible to every API worker on the database."""
+    __tablename__ = "training_job"
+
+    id = Column(String, primary_key=True)
+    status = Column(String, nullable=False, index=True)
+    params = Column(Text, nullable=False)                    # JSON-encoded build_model arguments
+    submitted_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    owner = Column(String, nullable=True)                    # host:pid of the API worker running it
+    heartbeat_at = Column(DateTime, nullable=True)           # last check-in from that worker
+    result = Column(Text, nullable=True)                     # JSON-encoded summary
+    error = Column(Text, nullable=True)
+    charts = Column(Text, nullable=True)                     # JSON-encoded chart report
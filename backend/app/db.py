@@ -1,13 +1,16 @@
-from dotenv import load_dotenv
-load_dotenv()
-
-import os
-DATABASE_URL = os.getenv("DATABASE_URL")
+import asyncio
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+import anyio
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 load_dotenv()
 
@@ -16,6 +19,137 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set. Please check your .env file.")
 
-engine = create_engine(DATABASE_URL)
+# Pool settings, overridable from the environment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Threads for database work from async routes: one per connection the pool can
+# hand out, apart from Starlette's shared threadpool so DB waits never take its threads
+DB_THREADS = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+class PoolStats:
+    """Counters for connection checkouts and how long callers waited for them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts_total": self.checkouts,
+                "timeouts_total": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (queueing plus connecting)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(url: str) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if make_url(url).database in (None, "", ":memory:"):
+            # One shared connection, otherwise every checkout gets a new empty database
+            return dict(options, poolclass=StaticPool)
+        return dict(options, poolclass=TimedQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+@contextmanager
+def session_scope():
+    """Session for one unit of work: rolled back on error, always closed. Callers commit."""
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_db():
+    """FastAPI dependency wrapping `session_scope`."""
+    with session_scope() as db:
+        yield db
+
+
+# One thread lane per event loop, dropped with the loop (tests and workers start several)
+_db_limiters = weakref.WeakKeyDictionary()
+
+
+async def run_in_session(function, *args):
+    """
+    Await `function(db, *args)` run in its own session on a database thread,
+    so async routes never block the event loop on a query or a pool checkout.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = _db_limiters.get(loop)
+    if limiter is None:
+        limiter = _db_limiters[loop] = anyio.CapacityLimiter(DB_THREADS)
+
+    def call():
+        with session_scope() as db:
+            return function(db, *args)
+
+    return await anyio.to_thread.run_sync(call, limiter=limiter)
+
+
+def pool_status() -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            idle=pool.checkedin(),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    status.update(pool_stats.snapshot())
+    return status
@@ -1,11 +1,22 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from .routes import data, optimize
-from .data import feedback
-from app.db import engine
-from app.data.feedback_model import Base
+from app.startup import WARMUP, mark_ready, timed, warm_up
 
-app = FastAPI()
+with timed("import fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from app.metrics import InstrumentedJSONResponse, MetricsMiddleware
+with timed("import database"):
+    from app.db import engine
+    from app.data.feedback_model import Base
+    from app.data.feedback_aggregates import ensure_feedback_schema
+    from app.data import training_model  # noqa: F401  (registers the training run tables)
+with timed("import routes"):
+    from .routes import data, optimize, system, training
+    from .data import feedback
+    from .data.feedback_ingest import flush_feedback_buffer
+    from app.concurrency import MODEL_WORKERS, start_model_pool, stop_model_pool
+    from app.services.jobs import resume_training_jobs
+
+app = FastAPI(default_response_class=InstrumentedJSONResponse)
 
 origins = [
     "https://unite-match-ai.vercel.app",  # your deployed frontend
@@ -18,16 +29,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
 
-Base.metadata.create_all(bind=engine)
+# Outermost, so request latency includes CORS handling
+app.add_middleware(MetricsMiddleware)
+
+with timed("create tables"):
+    Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist
+    ensure_feedback_schema(engine)
+
+# Uvicorn only reports the worker ready once startup handlers have finished.
+# With a model pool, the models load in its workers rather than here.
+def _startup():
+    warm_up(models=MODEL_WORKERS <= 0)
+    if WARMUP and MODEL_WORKERS > 0:
+        with timed("model workers"):
+            start_model_pool()
+    # Training jobs are shared by all workers through the database
+    resume_training_jobs()
+    mark_ready()
+
+app.add_event_handler("startup", _startup)
+
+# Don't lose buffered feedback on a clean shutdown
+app.add_event_handler("shutdown", flush_feedback_buffer)
+app.add_event_handler("shutdown", stop_model_pool)
 
 # Route files
 app.include_router(data.router)
 app.include_router(optimize.router)
+app.include_router(training.router)
+app.include_router(system.router)
 app.include_router(feedback.router)
 
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "UniteMatch AI Backend is live!"}
\ No newline at end of file
@@ -0,0 +1,214 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from fastapi.responses import JSONResponse
+
+from app.profiler import SamplingProfiler, should_profile
+
+# Upper bounds in seconds, from sub-millisecond lookups up to training-sized requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram kept in process memory.
+
+    `observe` is a bisect plus three additions under a lock, so it can stay on
+    in production. Each worker process reports its own series.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}    # label values -> [bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, [list(value[0]), value[1], value[2]]) for key, value in self._series.items())
+
+        for label_values, (counts, total, count) in series:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{labels + "," if labels else ""}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+    def drain(self) -> dict:
+        """Take every series recorded so far and start empty; see `merge_metrics`."""
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, series: dict):
+        with self._lock:
+            for label_values, (counts, total, count) in series.items():
+                mine = self._series.get(label_values)
+                if mine is None:
+                    mine = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                mine[0] = [a + b for a, b in zip(mine[0], counts)]
+                mine[1] += total
+                mine[2] += count
+
+
+class Counter:
+    """Prometheus-style counter kept in process memory, one value per label set."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: int = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+    def drain(self) -> dict:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values: dict):
+        with self._lock:
+            for label_values, value in values.items():
+                self._values[label_values] = self._values.get(label_values, 0) + value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "unitematch_request_seconds", "End-to-end HTTP request latency.", ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram(
+    "unitematch_stage_seconds", "Time spent in each stage of request handling.", ("stage",)
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "unitematch_response_cache_lookups_total", "Response cache lookups by result (hit, shared_hit, miss).", ("cache", "result")
+)
+REJECTED_REQUESTS = Counter(
+    "unitematch_rejected_requests_total", "Requests answered 429 because a concurrency limit was saturated.", ("limit",)
+)
+METRICS = (REQUEST_SECONDS, STAGE_SECONDS, RESPONSE_CACHE_LOOKUPS, REJECTED_REQUESTS)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one stage (csv_read, db_aggregate, predict, ...)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, name)
+
+
+def timed_stage(name: str):
+    """Decorator form of `stage`."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - started, name)
+        return wrapper
+    return decorator
+
+
+class InstrumentedJSONResponse(JSONResponse):
+    """Default response class: times the JSON encoding of every response body."""
+
+    def render(self, content) -> bytes:
+        with stage("serialize"):
+            return super().render(content)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording every request in REQUEST_SECONDS, labelled by
+    route template, and running the sampling profiler on requests that ask for it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+        profiler = None
+        if should_profile(dict(scope["headers"])):
+            profiler = SamplingProfiler(f'{scope["method"]} {scope["path"]}')
+            profiler.start()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profiler is not None:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profiler.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"], getattr(route, "path", "unmatched"), str(status)
+            )
+
+
+def render_metrics() -> str:
+    """All histograms and counters in the Prometheus text exposition format."""
+    lines = [line for metric in METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def drain_metrics() -> dict:
+    """
+    Everything this process recorded since the last call, emptying its metrics.
+    Model pool workers send this back with each result, so the API process's
+    /metrics also covers the work they did.
+    """
+    return {metric.name: metric.drain() for metric in METRICS}
+
+
+def merge_metrics(drained: dict):
+    for metric in METRICS:
+        metric.merge(drained.get(metric.name, {}))
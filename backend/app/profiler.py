@@ -0,0 +1,127 @@
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+# Off unless PROFILING=true; then a request is profiled when it sends "X-Profile: 1",
+# or at random with probability PROFILE_SAMPLE_RATE.
+PROFILING = os.getenv("PROFILING", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+MAX_PROFILES = 50
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+# The profile of the request being handled, so model calls can profile their pool worker too
+_current = contextvars.ContextVar("current_profile", default=None)
+
+
+def should_profile(headers: dict) -> bool:
+    if not PROFILING:
+        return False
+    if headers.get(b"x-profile", b"").lower() in (b"1", b"true", b"yes"):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread that is running app code, every
+    `interval` seconds, until stopped.
+
+    Sync endpoints run on a threadpool rather than the thread that starts the
+    profile, so it can't trace one thread; samples from requests running at the
+    same time are mixed in. Model calls that run in a pool worker are sampled
+    there and merged in under a "model worker <pid>" root frame. Stacks are
+    stored in the collapsed format ("outer;inner count") that flamegraph.pl
+    and speedscope read.
+    """
+
+    def __init__(self, label: str, interval: float = PROFILE_INTERVAL):
+        self.id = datetime.now().strftime("%Y%m%d-%H%M%S-") + f"{random.getrandbits(24):06x}"
+        self.label = label
+        self.interval = interval
+        self.samples = Counter()
+        self.worker_samples = 0
+        self._token = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._started = None
+        self.seconds = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        self._thread.start()
+
+    def collect(self) -> Counter:
+        """Stop sampling and return the stacks without keeping the profile (used in pool workers)."""
+        self._stop.set()
+        self._thread.join()
+        if self._token is not None:
+            _current.reset(self._token)
+        self.seconds = time.perf_counter() - self._started
+        return self.samples
+
+    def merge(self, samples: Counter, root: str):
+        """Add stacks sampled in another process under a `root` frame."""
+        for stack, count in samples.items():
+            self.samples[f"{root};{stack}"] += count
+        self.worker_samples += sum(samples.values())
+
+    def stop(self):
+        self.collect()
+        with _profiles_lock:
+            _profiles[self.id] = self
+            while len(_profiles) > MAX_PROFILES:
+                _profiles.popitem(last=False)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(APP_DIR)
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                if in_app:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "seconds": round(self.seconds or 0.0, 4),
+            "samples": sum(self.samples.values()),
+            # Of which sampled in model pool workers
+            "worker_samples": self.worker_samples,
+        }
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def current_profile():
+    """The profiler of the request being handled, or None."""
+    return _current.get()
+
+
+def list_profiles() -> list[dict]:
+    with _profiles_lock:
+        return [profile.summary() for profile in reversed(_profiles.values())]
+
+
+def get_profile(profile_id: str):
+    with _profiles_lock:
+        return _profiles.get(profile_id)
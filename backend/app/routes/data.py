@@ -1,8 +1,50 @@
-from fastapi import APIRouter
-from app.services.model import get_cleaned_data
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app.data.loader import get_snapshot
+from app.services.preview import (
+    PREVIEW_FILTERS, PREVIEW_MAX_AGE, choose_encoding, etag_matches, get_preview_cache
+)
 
 router = APIRouter()
 
+
+def _split(value: Optional[str]) -> tuple:
+    return tuple(part.strip() for part in value.split(",") if part.strip()) if value else ()
+
+
 @router.get("/data-preview")
-def data_preview():
-    return get_cleaned_data()
\ No newline at end of file
+def data_preview(
+    request: Request,
+    fields: Optional[str] = None,
+    role: Optional[str] = None,
+    tier: Optional[str] = None,
+    style: Optional[str] = None,
+    lane: Optional[str] = None,
+):
+    """
+    Merged dataset rows, serialized once per dataset snapshot.
+
+    `fields` projects columns (comma-separated); role/tier/style/lane keep rows
+    whose value is in the comma-separated list. Conditional requests with a
+    matching If-None-Match get a 304.
+    """
+    filters = dict(zip(PREVIEW_FILTERS, map(_split, (role, tier, style, lane))))
+    try:
+        body = get_preview_cache(get_snapshot()).select(_split(fields), filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"), body.encodings)
+    etag = body.etag_for(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={PREVIEW_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.encodings[encoding], media_type="application/json", headers=headers)
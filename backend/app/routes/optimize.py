@@ -1,42 +1,158 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from app.services.model import optimize_team, build_model, predict_synergy_winrate
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel, Field
+from app.services.model import (
+    cached_optimize_team,
+    cached_synergy_winrate,
+    optimize_team_batch,
+    predict_synergy_winrate_batch
+)
+from app.concurrency import route_limit, run_model
+from app.data.loader import get_snapshot
+from app.services.preview import PREVIEW_MAX_AGE, choose_encoding, etag_matches
+from app.services.search import suggest_teams, MAX_TEAM_SIZE
+from app.services.synergy_matrix import get_synergy_matrix_body, score_team
 import traceback
+from functools import partial
 
 router = APIRouter()
 
+MAX_BATCH_TEAMS = 5000
+
+# Model work runs in the model pool (app/concurrency.py), each route within its own limit
+OPTIMIZE_LIMIT = route_limit("optimize-team")
+SYNERGY_LIMIT = route_limit("synergy-winrate")
+SYNERGY_SCORE_LIMIT = route_limit("synergy-score")
+BATCH_LIMIT = route_limit("batch", heavy=True)
+SUGGEST_LIMIT = route_limit("suggest-team", heavy=True)
+
 class TeamRequest(BaseModel):
     team: list[str]
+
+class BatchTeamRequest(BaseModel):
+    teams: list[list[str]]
+
+class SuggestRequest(BaseModel):
+    team: list[str] = []
+    banned: list[str] = []
+    required_roles: list[str] = []
+    required_lanes: list[str] = []
+    stack_size: int = Field(MAX_TEAM_SIZE, ge=1, le=MAX_TEAM_SIZE)
+    top_k: int = Field(5, ge=1, le=50)
+
+class SynergyScoreRequest(BaseModel):
+    team: list[str]
+    top_k: int = Field(5, ge=1, le=50)
+
+def check_batch_size(request: BatchTeamRequest):
+    if len(request.teams) > MAX_BATCH_TEAMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_TEAMS} teams per batch")
     
 @router.post("/optimize-team")
-def optimize(request: TeamRequest):
-    print("Received Team for Optimization:", request.team) # DEBUGGING
+async def optimize(request: TeamRequest):
     try:
-        result = optimize_team(request.team)
-        return {"optimized": result}
+        return await run_model(OPTIMIZE_LIMIT, cached_optimize_team, request.team)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Unknown, duplicate or missing Pokémon: the batch routes report these per team
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print("🔥 ERROR in /optimize-team:")
         traceback.print_exc()  # This shows the full error traceback in the Render logs
         raise HTTPException(status_code=500, detail=str(e))
     
-@router.get("/train-model")
-def train_model():
+@router.post("/synergy-winrate")
+async def get_synergy_winrate(data: TeamRequest):
     try:
-        result = build_model(tune=True)
-        return {
-            "accuracy": result["accuracy"],
-            "f1_score": result["f1_score"],
-            "best_params": result["best_params"],
-            "confusion_matrix": result["confusion_matrix"],
-            "feature_importance": dict(zip(result["features"], result["feature_importance"])),
-            "classes": result["classes"]
-        }
+        return await run_model(SYNERGY_LIMIT, cached_synergy_winrate, data.team)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        print("🔥 ERROR in /synergy-winrate:")
+        traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    
-@router.post("/synergy-winrate")
-def get_synergy_winrate(data: TeamRequest):
+
+@router.post("/optimize-team/batch")
+async def optimize_batch(request: BatchTeamRequest):
+    check_batch_size(request)
+    try:
+        return await run_model(BATCH_LIMIT, optimize_team_batch, request.teams)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("🔥 ERROR in /optimize-team/batch:")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/synergy-winrate/batch")
+async def get_synergy_winrate_batch(request: BatchTeamRequest):
+    check_batch_size(request)
     try:
-        return predict_synergy_winrate(data.team)
+        return {"results": await run_model(BATCH_LIMIT, predict_synergy_winrate_batch, request.teams)}
+    except HTTPException:
+        raise
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        print("🔥 ERROR in /synergy-winrate/batch:")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/suggest-team")
+async def suggest_team(request: SuggestRequest):
+    try:
+        return await run_model(
+            SUGGEST_LIMIT,
+            partial(
+                suggest_teams,
+                banned=request.banned,
+                required_roles=request.required_roles,
+                required_lanes=request.required_lanes,
+                stack_size=request.stack_size,
+                top_k=request.top_k
+            ),
+            request.team
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print("🔥 ERROR in /suggest-team:")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/synergy-matrix")
+def synergy_matrix(request: Request):
+    """
+    Per-Pokémon unary scores and the pairwise synergy matrix for the current
+    dataset snapshot, so clients can score teams locally as members change:
+    win rate = (sum of members' unary + sum of pairs[i][j] over member pairs) / team size.
+    """
+    body = get_synergy_matrix_body(get_snapshot())
+    encoding = choose_encoding(request.headers.get("accept-encoding"), body.encodings)
+    etag = body.etag_for(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={PREVIEW_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.encodings[encoding], media_type="application/json", headers=headers)
+
+@router.post("/synergy-score")
+async def synergy_score(request: SynergyScoreRequest):
+    try:
+        return await run_model(SYNERGY_SCORE_LIMIT, score_team, request.team, request.top_k)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print("🔥 ERROR in /synergy-score:")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
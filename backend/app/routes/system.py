@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.concurrency import limits_status
+from app.db import pool_status
+from app.metrics import render_metrics
+from app.profiler import get_profile, list_profiles
+from app.services.response_cache import cache_stats
+from app.startup import startup_report
+
+router = APIRouter()
+
+@router.get("/db/pool")
+def db_pool():
+    """Connection pool occupancy and checkout wait times, for sizing workers against the database."""
+    return pool_status()
+
+@router.get("/startup")
+def startup():
+    """Time spent in each import and warm-up step while this worker started."""
+    return startup_report()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request and per-stage latency histograms in the Prometheus text format (this worker only)."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/cache")
+def response_cache():
+    """Hit/miss counts and size of the /optimize-team and /synergy-winrate caches (this worker and its model pool)."""
+    return cache_stats()
+
+@router.get("/metrics/limits")
+def concurrency_limits():
+    """Model pool and per-route occupancy: calls running, waiting, and rejected with a 429."""
+    return limits_status()
+
+@router.get("/metrics/profiles")
+def profiles():
+    """Recent sampling profiles (see PROFILING in app/profiler.py)."""
+    return {"profiles": list_profiles()}
+
+@router.get("/metrics/profiles/{profile_id}", response_class=PlainTextResponse)
+def profile(profile_id: str):
+    """One profile as collapsed stacks, ready for flamegraph.pl or speedscope."""
+    found = get_profile(profile_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return PlainTextResponse(found.collapsed())
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Literal
+from pydantic import BaseModel, Field
+from app.services.jobs import (
+    FINISHED,
+    SUCCEEDED,
+    cancel_job,
+    get_job,
+    get_job_result,
+    list_jobs,
+    submit_training_job
+)
+from app.services.registry import promote_model_artifacts
+from app.services.run_store import compare_training_runs, get_training_runs, list_training_runs
+
+router = APIRouter()
+
+class TrainingJobRequest(BaseModel):
+    tune: bool = True
+    search: Literal["grid", "random", "halving"] = "grid"
+    n_trials: int | None = Field(None, ge=1)
+    n_jobs: int | None = Field(None, ge=1)
+    charts: bool = True     # false skips chart rendering, for fast retrains
+
+@router.get("/train-model", status_code=202)
+def train_model():
+    """Kept for existing clients: queues a tuned training run instead of blocking on it."""
+    return submit_training_job(tune=True)
+
+@router.post("/train-model/jobs", status_code=202)
+def submit_job(request: TrainingJobRequest):
+    return submit_training_job(
+        tune=request.tune, search=request.search, n_trials=request.n_trials, n_jobs=request.n_jobs,
+        charts=request.charts
+    )
+
+@router.get("/train-model/jobs")
+def jobs():
+    return {"jobs": list_jobs()}
+
+@router.get("/train-model/jobs/{job_id}")
+def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown training job")
+    return job
+
+@router.get("/train-model/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = get_job_result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown training job")
+    if job["status"] not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Training job is {job['status']}")
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=job["error"] or f"Training job was {job['status']}")
+    return job["result"]
+
+@router.delete("/train-model/jobs/{job_id}")
+def cancel(job_id: str):
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown training job")
+    return job
+
+@router.get("/training-runs")
+def training_runs(limit: int = Query(50, ge=1, le=1000), order_by: str | None = None):
+    """Recent training runs, or the best ones by a metric (e.g. `order_by=f1_weighted`)."""
+    return {"runs": list_training_runs(limit=limit, order_by=order_by)}
+
+@router.get("/training-runs/compare")
+def compare_runs(ids: str):
+    """Side-by-side params, metrics, phase timings and importances for comma-separated run IDs."""
+    run_ids = [run_id.strip() for run_id in ids.split(",") if run_id.strip()]
+    if not run_ids:
+        raise HTTPException(status_code=400, detail="No run IDs given")
+    try:
+        return compare_training_runs(run_ids)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@router.get("/training-runs/{run_id}")
+def training_run(run_id: str):
+    try:
+        return get_training_runs([run_id])[0]
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@router.post("/training-runs/{run_id}/promote")
+def promote_run(run_id: str):
+    """Serve the model a past training run produced."""
+    try:
+        get_training_runs([run_id])
+        artifacts = promote_model_artifacts(run_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"run_id": run_id, "model_version": artifacts.version}
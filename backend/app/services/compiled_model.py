@@ -0,0 +1,210 @@
+import os
+from dataclasses import dataclass
+import numpy as np
+
+# LightGBM's missing-value handling per split, as stored in the model dump
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+ZERO_THRESHOLD = 1e-35  # LightGBM's kZeroThreshold
+
+# Largest allowed gap between compiled and LightGBM class probabilities
+PARITY_TOLERANCE = 1e-9
+PARITY_RANDOM_ROWS = 2000
+
+
+@dataclass(frozen=True)
+class CompiledModel:
+    """
+    A LightGBM classifier's trees flattened into NumPy arrays.
+
+    Internal nodes of every tree come first, then leaves, which are their own
+    children. Prediction needs only NumPy and walks all trees at once, one
+    tree level per step, so its cost is rows x trees x depth.
+    """
+    version: str            # registry version of the artifacts it was compiled from
+    classes: np.ndarray     # model.classes_, indexed by the argmax of the scores
+    num_features: int
+    objective: str          # "multiclass" or "binary"
+    max_depth: int
+    roots: np.ndarray           # int32 (trees,), root node of each tree
+    split_feature: np.ndarray   # int32 (internal,)
+    threshold: np.ndarray       # float64 (internal,)
+    threshold32: np.ndarray     # float32 (internal,), largest float32 <= threshold
+    default_left: np.ndarray    # bool (internal,)
+    missing_type: np.ndarray    # int8 (internal,)
+    children: np.ndarray        # int32 (internal + leaves, 2), [right, left]
+    leaf_value: np.ndarray      # float64 (leaves,)
+
+    @property
+    def num_class(self) -> int:
+        return len(self.classes)
+
+    def _go_left(self, X: np.ndarray) -> np.ndarray:
+        """(rows, internal) decision of every split for every row."""
+        values = X[:, self.split_feature]
+        missing = np.isnan(values)
+        if not missing.any() and not (self.missing_type == MISSING_ZERO).any():
+            # Float32 inputs compare exactly against the rounded-down thresholds
+            return values <= self.threshold32
+
+        values = values.astype(np.float64)
+        # Without a missing type, NaN is treated as zero; with "Zero", zero is missing too
+        values[missing & (self.missing_type != MISSING_NAN)] = 0.0
+        missing &= self.missing_type == MISSING_NAN
+        missing |= (self.missing_type == MISSING_ZERO) & (np.abs(values) <= ZERO_THRESHOLD)
+        return np.where(missing, self.default_left, values <= self.threshold)
+
+    def raw_scores(self, X: np.ndarray) -> np.ndarray:
+        """(rows, classes) summed leaf values, or (rows, 1) for a binary model."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.num_features:
+            raise ValueError(f"Expected rows of {self.num_features} features, got shape {X.shape}")
+
+        internal = len(self.split_feature)
+        go_left = self._go_left(X).ravel()
+        offsets = (np.arange(len(X), dtype=np.intp) * internal)[:, None]
+        children = self.children.ravel()
+        node = np.broadcast_to(self.roots.astype(np.intp), (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            # Leaves read any decision (the last node's) and stay put
+            decision = go_left[offsets + np.minimum(node, internal - 1)]
+            node = children[node * 2 + decision]
+
+        # Trees are stored iteration by iteration, one per class
+        leaves = self.leaf_value[node - internal]
+        per_tree = 1 if self.objective == "binary" else self.num_class
+        return leaves.reshape(len(X), -1, per_tree).sum(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = self.raw_scores(X)
+        if self.objective == "binary":
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Class labels, as `model.predict` returns them."""
+        scores = self.raw_scores(X)
+        if self.objective == "binary":
+            return self.classes[(scores[:, 0] > 0).astype(int)]
+        return self.classes[scores.argmax(axis=1)]
+
+
+def compile_model(model, version: str) -> CompiledModel:
+    """
+    Flatten a fitted LGBMClassifier. Raises ValueError for what the compiled
+    evaluator doesn't cover (categorical splits, other objectives, linear trees).
+    """
+    dump = model.booster_.dump_model()
+    objective = dump.get("objective", "").split(" ")[0]
+    if objective not in ("multiclass", "binary"):
+        raise ValueError(f"Unsupported objective: {objective or 'unknown'}")
+    if model.get_params().get("linear_tree"):
+        raise ValueError("Linear trees are not supported")
+
+    splits, links, leaf_value, roots = [], [], [], []
+    max_depth = 0
+
+    # Leaves are numbered ~i while walking and moved after the internal nodes below
+    def add(node, depth) -> int:
+        nonlocal max_depth
+        max_depth = max(max_depth, depth)
+        if "leaf_value" in node:
+            leaf_value.append(node["leaf_value"])
+            return ~(len(leaf_value) - 1)
+        if node["decision_type"] != "<=":
+            raise ValueError(f"Unsupported split: {node['decision_type']}")
+        index = len(splits)
+        splits.append(node)
+        links.append(None)
+        links[index] = (add(node["right_child"], depth + 1), add(node["left_child"], depth + 1))
+        return index
+
+    for tree in dump["tree_info"]:
+        roots.append(add(tree["tree_structure"], 0))
+
+    internal = max(len(splits), 1)  # a model of single-leaf trees still gets one dummy split
+
+    def position(index):
+        return internal + ~index if index < 0 else index
+
+    children = np.array(
+        [[position(right), position(left)] for right, left in links]
+        + [[0, 0]] * (internal - len(splits))
+        + [[internal + i, internal + i] for i in range(len(leaf_value))],
+        dtype=np.int32,
+    ).reshape(-1, 2)
+    threshold = np.array([node["threshold"] for node in splits] or [0.0], dtype=np.float64)
+    threshold32 = threshold.astype(np.float32)
+    above = threshold32.astype(np.float64) > threshold
+    threshold32[above] = np.nextafter(threshold32[above], np.float32(-np.inf))
+
+    return CompiledModel(
+        version=version,
+        classes=np.asarray(model.classes_),
+        num_features=int(dump["max_feature_idx"]) + 1,
+        objective=objective,
+        max_depth=max_depth,
+        roots=np.array([position(root) for root in roots], dtype=np.int32),
+        split_feature=np.array([node["split_feature"] for node in splits] or [0], dtype=np.int32),
+        threshold=threshold,
+        threshold32=threshold32,
+        default_left=np.array([node["default_left"] for node in splits] or [False], dtype=bool),
+        missing_type=np.array([MISSING_TYPES[node["missing_type"]] for node in splits] or [MISSING_NONE], dtype=np.int8),
+        children=children,
+        leaf_value=np.array(leaf_value, dtype=np.float64),
+    )
+
+
+def booster_probabilities(model, X: np.ndarray) -> np.ndarray:
+    """(rows, classes) probabilities straight from the LightGBM booster, skipping the sklearn wrapper."""
+    probabilities = model.booster_.predict(np.ascontiguousarray(X, dtype=np.float32))
+    if probabilities.ndim == 1:
+        return np.column_stack([1.0 - probabilities, probabilities])
+    return probabilities
+
+
+def parity_rows(compiled: CompiledModel, n: int, seed: int = 0) -> np.ndarray:
+    """Random rows spread a little past each feature's split thresholds, so every branch is taken."""
+    rng = np.random.default_rng(seed)
+    low = np.zeros(compiled.num_features)
+    high = np.ones(compiled.num_features)
+    np.minimum.at(low, compiled.split_feature, compiled.threshold - 1)
+    np.maximum.at(high, compiled.split_feature, compiled.threshold + 1)
+    return rng.uniform(low, high, size=(n, compiled.num_features)).astype(np.float32)
+
+
+def check_parity(compiled: CompiledModel, model, X: np.ndarray = None) -> float:
+    """
+    Compare compiled and LightGBM predictions on `X` (if given) plus
+    PARITY_RANDOM_ROWS random rows. Returns the largest probability gap;
+    raises ValueError on any differing label or a gap over PARITY_TOLERANCE.
+    """
+    rows = parity_rows(compiled, PARITY_RANDOM_ROWS)
+    if X is not None:
+        rows = np.vstack([np.asarray(X, dtype=np.float32), rows])
+
+    expected = booster_probabilities(model, rows)
+    gap = float(np.abs(compiled.predict_proba(rows) - expected).max())
+    mismatches = int((compiled.predict(rows) != compiled.classes[expected.argmax(axis=1)]).sum())
+    if mismatches or gap > PARITY_TOLERANCE:
+        raise ValueError(f"Compiled model differs from LightGBM: {mismatches} labels, max probability gap {gap:.2e}")
+    return gap
+
+
+def save_compiled_model(compiled: CompiledModel, path: str):
+    """Write to a temp file, then rename, so readers never see a half-written file."""
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **{name: np.asarray(value) for name, value in compiled.__dict__.items()})
+    os.replace(tmp_path, path)
+
+
+def load_compiled_model(path: str) -> CompiledModel:
+    with np.load(path, allow_pickle=False) as data:
+        fields = {name: data[name] for name in data.files}
+    for name in ("version", "objective"):
+        fields[name] = str(fields[name])
+    for name in ("num_features", "max_depth"):
+        fields[name] = int(fields[name])
+    return CompiledModel(**fields)
@@ -0,0 +1,311 @@
+import os
+import json
+import socket
+import threading
+import traceback
+import uuid
+import multiprocessing
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, text, update
+
+from app.db import session_scope
+from app.data.training_model import TrainingJob
+from app.services.reports import TRAINING_CHARTS, get_training_report, submit_training_report
+
+# Training runs in separate processes so API workers never block on it.
+# Jobs live in the training_job table, so any API worker can report on or
+# cancel any job, and at most TRAINING_WORKERS run at once across all of them.
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "1"))
+MAX_FINISHED_JOBS = 50
+
+# How often a worker running a job checks in (and notices a cancel from another
+# worker), and how long without a check-in before the job counts as abandoned
+JOB_HEARTBEAT_SECONDS = 5.0
+JOB_STALE_SECONDS = 60.0
+# How often idle dispatchers look for jobs queued by other workers
+JOB_POLL_SECONDS = 2.0
+# Postgres advisory lock taken while claiming, so concurrent claims are serialized
+JOB_CLAIM_LOCK = 0x756D6A62
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+# Training processes this API worker started, by job id
+_processes = {}
+_lock = threading.Lock()
+_wake = threading.Event()
+_dispatchers = []
+_owner = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _format_time(value: datetime):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+
+def _json_value(value):
+    # NumPy scalars in search results
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def summarize_training(result: dict) -> dict:
+    """JSON-friendly summary of a `build_model` result."""
+    return {
+        "accuracy": float(result["accuracy"]),
+        "f1_score": float(result["f1_score"]),
+        "best_params": result["best_params"],
+        "confusion_matrix": result["confusion_matrix"],
+        "feature_importance": dict(zip(result["features"], map(int, result["feature_importance"]))),
+        "classes": result["classes"],
+        "run_id": result["run_id"]
+    }
+
+
+def _run_training(conn, params: dict):
+    """Child-process entry point: train, then send back the summary or the error."""
+    try:
+        from app.services.model import build_model
+        result = build_model(**params)
+        conn.send({"result": summarize_training(result), "report_inputs": result["report_inputs"]})
+    except BaseException:
+        conn.send({"error": traceback.format_exc()})
+    finally:
+        conn.close()
+
+
+def _record(job: TrainingJob, with_result: bool = False) -> dict:
+    """API view of a job row, with the live chart status when this worker is rendering them."""
+    record = {
+        "id": job.id,
+        "status": job.status,
+        "params": json.loads(job.params),
+        "submitted_at": _format_time(job.submitted_at),
+        "started_at": _format_time(job.started_at),
+        "finished_at": _format_time(job.finished_at),
+        "error": job.error,
+        "charts": None,
+    }
+    if job.charts:
+        charts = json.loads(job.charts)
+        record["charts"] = get_training_report(charts["run_id"]) or charts
+    if with_result:
+        record["result"] = json.loads(job.result) if job.result else None
+    return record
+
+
+def _fail_abandoned(db, now: datetime):
+    """Fail running jobs whose API worker stopped checking in (it crashed or was restarted)."""
+    db.execute(
+        update(TrainingJob)
+        .where(TrainingJob.status == RUNNING, TrainingJob.heartbeat_at < now - timedelta(seconds=JOB_STALE_SECONDS))
+        .values(status=FAILED, finished_at=now, error="The API worker running this job stopped responding")
+    )
+
+
+def _lock_claims(db):
+    """
+    Serialize claims across API workers for the rest of the transaction. On
+    Postgres that takes an advisory lock; SQLite already runs the claiming
+    UPDATE (count included) under its single database write lock.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": JOB_CLAIM_LOCK})
+
+
+def _claim_next():
+    """
+    Fail abandoned jobs, then move the oldest queued job to running for this
+    worker if fewer than TRAINING_WORKERS are running. Returns the job row, or None.
+
+    The count and the claim happen under one lock (see _lock_claims), so
+    workers racing for different jobs can't together exceed TRAINING_WORKERS,
+    and the `status = queued` condition lets only one of them win the same job.
+    """
+    now = datetime.now()
+    with session_scope() as db:
+        _fail_abandoned(db, now)
+        db.commit()
+
+        job_id = db.scalar(
+            select(TrainingJob.id).where(TrainingJob.status == QUEUED)
+            .order_by(TrainingJob.submitted_at, TrainingJob.id).limit(1)
+        )
+        if job_id is None:
+            return None
+        _lock_claims(db)
+        running = select(func.count()).select_from(TrainingJob).where(TrainingJob.status == RUNNING).scalar_subquery()
+        claimed = db.execute(
+            update(TrainingJob)
+            .where(TrainingJob.id == job_id, TrainingJob.status == QUEUED, running < TRAINING_WORKERS)
+            .values(status=RUNNING, owner=_owner, started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.commit()
+        return db.get(TrainingJob, job_id) if claimed else None
+
+
+def _heartbeat(job_id: str) -> bool:
+    """Check in for a running job; False once it was cancelled (possibly by another worker)."""
+    try:
+        with session_scope() as db:
+            still_running = db.execute(
+                update(TrainingJob)
+                .where(TrainingJob.id == job_id, TrainingJob.status == RUNNING)
+                .values(heartbeat_at=datetime.now())
+            ).rowcount
+            db.commit()
+    except Exception:
+        # Keep training through a database blip; the next heartbeat tries again
+        traceback.print_exc()
+        return True
+    return still_running == 1
+
+
+def _finish(job_id: str, **fields):
+    """Record a job's outcome unless it was cancelled meanwhile, then forget the oldest finished jobs."""
+    with session_scope() as db:
+        db.execute(
+            update(TrainingJob)
+            .where(TrainingJob.id == job_id, TrainingJob.status == RUNNING)
+            .values(finished_at=datetime.now(), **fields)
+        )
+        keep = (
+            select(TrainingJob.id).where(TrainingJob.status.in_(FINISHED))
+            .order_by(TrainingJob.finished_at.desc()).limit(MAX_FINISHED_JOBS)
+        )
+        db.execute(delete(TrainingJob).where(TrainingJob.status.in_(FINISHED), TrainingJob.id.not_in(keep)))
+        db.commit()
+    with _lock:
+        _processes.pop(job_id, None)
+
+
+def _set_report(job_id: str, report: dict, if_empty: bool = False):
+    """Store a job's chart report; with `if_empty`, only when none is stored yet."""
+    with session_scope() as db:
+        query = update(TrainingJob).where(TrainingJob.id == job_id)
+        if if_empty:
+            query = query.where(TrainingJob.charts.is_(None))
+        db.execute(query.values(charts=json.dumps(report)))
+        db.commit()
+
+
+def _run(context, job: TrainingJob):
+    params = json.loads(job.params)
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_training, args=(child_conn, {k: v for k, v in params.items() if k != "charts"}), daemon=True
+    )
+    process.start()
+    child_conn.close()
+    with _lock:
+        _processes[job.id] = process
+
+    message = None
+    while message is None:
+        if parent_conn.poll(JOB_HEARTBEAT_SECONDS):
+            try:
+                message = parent_conn.recv()
+            except EOFError:
+                message = {"error": f"Training process exited with code {process.exitcode}"}
+        elif not _heartbeat(job.id):
+            process.terminate()
+            break
+    process.join()
+    if message is None:
+        # Cancelled; cancel_job already updated the row
+        with _lock:
+            _processes.pop(job.id, None)
+        return
+
+    if "result" in message:
+        # Publish the new artifacts to this worker's model loader right away
+        from app.services.registry import get_model_artifacts
+        result = dict(message["result"], model_version=get_model_artifacts().version)
+        _finish(job.id, status=SUCCEEDED, result=json.dumps(result, default=_json_value))
+        if params["charts"] and TRAINING_CHARTS:
+            # Rendering happens after the job has finished and never counts towards it.
+            # It may finish before the pending report below is stored, so that one never overwrites it.
+            report = submit_training_report(
+                result["run_id"], message["report_inputs"], on_done=lambda report: _set_report(job.id, report)
+            )
+            _set_report(job.id, report, if_empty=True)
+    else:
+        _finish(job.id, status=FAILED, error=message["error"])
+
+
+def _dispatch():
+    context = multiprocessing.get_context("spawn")
+    while True:
+        _wake.wait(JOB_POLL_SECONDS)
+        _wake.clear()
+        try:
+            job = _claim_next()
+            if job is not None:
+                _run(context, job)
+        except Exception:
+            # Database unavailable or similar: keep the dispatcher alive and retry on the next poll
+            traceback.print_exc()
+
+
+def start_dispatchers():
+    """Start this worker's dispatcher threads (idempotent)."""
+    with _lock:
+        while len(_dispatchers) < TRAINING_WORKERS:
+            thread = threading.Thread(target=_dispatch, daemon=True)
+            thread.start()
+            _dispatchers.append(thread)
+
+
+def resume_training_jobs():
+    """At startup: pick up jobs left queued or running when the previous workers stopped."""
+    with session_scope() as db:
+        pending = db.query(TrainingJob.id).filter(TrainingJob.status.in_([QUEUED, RUNNING])).first()
+    if pending is not None:
+        start_dispatchers()
+
+
+def submit_training_job(tune: bool = True, search: str = "grid", n_trials=None, n_jobs=None, charts: bool = True) -> dict:
+    """Queue a `build_model` run and return its job record."""
+    start_dispatchers()
+    job_id = uuid.uuid4().hex
+    params = {"tune": tune, "search": search, "n_trials": n_trials, "n_jobs": n_jobs, "charts": charts}
+    with session_scope() as db:
+        db.add(TrainingJob(id=job_id, status=QUEUED, params=json.dumps(params), submitted_at=datetime.now()))
+        db.commit()
+    _wake.set()
+    return get_job(job_id)
+
+
+def get_job(job_id: str):
+    """Job record without its (possibly large) result, or None if unknown."""
+    with session_scope() as db:
+        job = db.get(TrainingJob, job_id)
+        return None if job is None else _record(job)
+
+
+def get_job_result(job_id: str):
+    with session_scope() as db:
+        job = db.get(TrainingJob, job_id)
+        return None if job is None else _record(job, with_result=True)
+
+
+def list_jobs() -> list[dict]:
+    with session_scope() as db:
+        return [_record(job) for job in db.query(TrainingJob).order_by(TrainingJob.submitted_at)]
+
+
+def cancel_job(job_id: str):
+    """
+    Cancel a queued job, or stop a running one. A job running in another API
+    worker stops at its next heartbeat. Returns the job, or None if unknown.
+    """
+    with session_scope() as db:
+        db.execute(
+            update(TrainingJob)
+            .where(TrainingJob.id == job_id, TrainingJob.status.in_([QUEUED, RUNNING]))
+            .values(status=CANCELLED, finished_at=datetime.now())
+        )
+        db.commit()
+    with _lock:
+        process = _processes.pop(job_id, None)
+    if process is not None:
+        process.terminate()
+    return get_job(job_id)
@@ -1,31 +1,158 @@
 import os, sys
+import hashlib
+import pickle
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import numpy as np
 import pandas as pd
 import joblib
+import threading
+import time
+import traceback
+import uuid
 from datetime import datetime
-from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, classification_report
-from lightgbm import LGBMClassifier
-from imblearn.over_sampling import SMOTE
 from collections import Counter
-from app.data.loader import load_data
-from app.visuals import (
-    plot_confusion_matrix,
-    plot_feature_importance,
-    plot_correlation
+from app.db import session_scope
+from app.data.feedback_teams import get_team_records
+from app.data.loader import load_data, get_snapshot
+from app.data.roster import get_roster_index
+from app.metrics import stage
+from app.services.registry import MODEL_DIR, dump_atomic, export_compiled_model, get_model_artifacts, save_model_artifacts
+from app.services.response_cache import OPTIMIZE_CACHE, SYNERGY_CACHE
+from app.services.synergy import (
+    MAX_TEAM_SIZE,
+    SYNERGY_INDIVIDUAL_FEATURES,
+    SYNERGY_TEAM_FEATURES,
+    build_synergy_inputs,
+    get_synergy_table,
+    pad_teams,
+    synergy_categorical_features
 )
 
-LOG_PATH = os.path.join(os.path.dirname(__file__), "../data/training_log.csv")
+# Training and plotting dependencies (LightGBM, imblearn, model selection,
+# matplotlib/seaborn) are imported inside the functions that use them, so
+# workers that only serve predictions don't pay for them at startup.
+
+SEARCH_STRATEGIES = ("grid", "random", "halving")
+THREADS_PER_FIT = int(os.getenv("TRAINING_THREADS_PER_FIT", "1"))
+PARAM_GRID = {
+    "num_leaves": [15, 31, 64],
+    "learning_rate": [0.05, 0.1],
+    "boosting_type": ["gbdt", "dart"],
+    "min_child_samples": [10, 20],
+    "min_split_gain": [0.0, 0.1],
+    "n_estimators": [100, 200, 300],
+    "max_depth": [5, 7]
+}
+SYNERGY_MODEL_PATH = os.path.join(MODEL_DIR, "synergy_model.pkl")
+
+# Above this many rows the compiled backend hands the batch to LightGBM's own
+# tree loop, which overtakes NumPy's per-level gathers at a few hundred rows
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", "256"))
+
+# Recorded teams with at least this many matches join the synergy training
+# data. Their target is their win rate, shrunk toward their members' average
+# as if SYNERGY_TEAM_PRIOR_GAMES more games had been played at that rate.
+SYNERGY_TEAM_MIN_GAMES = int(os.getenv("SYNERGY_TEAM_MIN_GAMES", "5"))
+SYNERGY_TEAM_PRIOR_GAMES = 10
+MAX_SYNERGY_TEAMS = 5000
+
+def make_search(search: str, seed: int, n_trials=None, n_jobs=None, threads_per_fit=THREADS_PER_FIT):
+    """
+    Build the hyperparameter search for `build_model(tune=True)`.
+
+    Candidates run in parallel across cores; each LightGBM fit gets
+    `threads_per_fit` threads so the two levels don't oversubscribe the CPU.
+    """
+    from lightgbm import LGBMClassifier
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, StratifiedKFold
+
+    if n_jobs is None:
+        n_jobs = max(1, (os.cpu_count() or 1) // threads_per_fit)
+
+    estimator = LGBMClassifier(class_weight='balanced', random_state=seed, n_jobs=threads_per_fit, verbose=-1)
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=seed)
+    common = {"cv": cv, "scoring": "f1_weighted", "n_jobs": n_jobs}
+
+    if search == "grid":
+        return GridSearchCV(estimator, PARAM_GRID, **common)
+
+    if search == "random":
+        return RandomizedSearchCV(
+            estimator, PARAM_GRID, n_iter=n_trials or 30, random_state=seed, **common
+        )
+
+    # Successive halving: every candidate starts with few trees and only the best
+    # third survive each round to train with three times as many.
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingRandomSearchCV
+
+    max_trees = max(PARAM_GRID["n_estimators"])
+    param_distributions = {k: v for k, v in PARAM_GRID.items() if k != "n_estimators"}
+    return HalvingRandomSearchCV(
+        estimator,
+        param_distributions,
+        n_candidates=n_trials or 81,
+        resource="n_estimators",
+        max_resources=max_trees,
+        min_resources=max_trees // 9,
+        factor=3,
+        random_state=seed,
+        **common
+    )
+
+def search_trials(cv_results) -> list[dict]:
+    """One record per search candidate (params, timing, CV score), stored with the run."""
+    n = len(cv_results["params"])
+    iterations = cv_results.get("iter", np.zeros(n, dtype=int))
+    resources = cv_results.get("n_resources", [None] * n)
+    return [
+        {
+            "iteration": int(iterations[i]),
+            "resources": None if resources[i] is None else int(resources[i]),
+            "params": cv_results["params"][i],
+            "mean_fit_time": round(float(cv_results["mean_fit_time"][i]), 4),
+            "mean_score_time": round(float(cv_results["mean_score_time"][i]), 4),
+            "mean_test_score": round(float(cv_results["mean_test_score"][i]), 4),
+            "rank": int(cv_results["rank_test_score"][i]),
+        }
+        for i in range(n)
+    ]
 
-def normalize_name(name):
-    # Converts "alolan-raichu" or "Alolan Raichu" to "Alolan Raichu"
-    return ' '.join(word.capitalize() for word in name.replace("-", " ").split())
+def build_model(
+    tune: bool = False,
+    search: str = "grid",
+    n_trials: int | None = None,
+    n_jobs: int | None = None,
+    threads_per_fit: int = THREADS_PER_FIT
+):
+    """
+    Train a LightGBM model to predict UsageDifficulty based on enriched Pokémon features.
+
+    With `tune`, `search` picks the hyperparameter strategy (see SEARCH_STRATEGIES);
+    `n_trials` caps the candidates for "random" and "halving".
+    """
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {search}")
+
+    from imblearn.over_sampling import SMOTE
+    from lightgbm import LGBMClassifier
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    # Wall-clock seconds per phase, stored with the run
+    phases = {}
+    mark = time.perf_counter()
+
+    def end_phase(name):
+        nonlocal mark
+        now = time.perf_counter()
+        phases[name] = now - mark
+        mark = now
 
-def build_model(tune: bool = False):
-    """Train a LightGBM model to predict UsageDifficulty based on enriched Pokémon features."""
     final_df, df = load_data()
     seed = 123845
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
 
     # Drop sparse or overly categorical columns before modeling
     features = final_df.drop(columns=final_df.filter(regex="^(Tier_|Role_|AttackStyle_)").columns)
@@ -38,40 +165,27 @@ def build_model(tune: bool = False):
     # Fill any missing values (needed for SMOTE)
     X = X.fillna(0)
 
-    # Optional: visualize correlations before modeling
-    plot_correlation(final_df, X.columns)
-
     # Encode target labels (Novice, Intermediate, Expert)
     encoder = LabelEncoder()
     y_encoded = encoder.fit_transform(y)
 
     # Split into train/test with stratification
     X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, stratify=y_encoded, random_state=seed)
+    end_phase("load")
 
     # Apply SMOTE to balance the training data
     smote = SMOTE(random_state=seed)
     X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+    end_phase("smote")
 
     # Train the model (with optional hyperparameter tuning)
     if tune:
-        param_grid = {
-            "num_leaves": [15, 31, 64],
-            "learning_rate": [0.05, 0.1],
-            "boosting_type": ["gbdt", "dart"],
-            "min_child_samples": [10, 20],
-            "min_split_gain": [0.0, 0.1],
-            "n_estimators": [100, 200, 300],
-            "max_depth": [5, 7]
-        }
-        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=seed)
-        grid = GridSearchCV(
-            LGBMClassifier(class_weight='balanced', random_state=seed),
-            param_grid,
-            cv=cv
-        )
-        grid.fit(X_train_resampled, y_train_resampled)
-        clf = grid.best_estimator_
-        best_params = grid.best_params_
+        search_cv = make_search(search, seed, n_trials=n_trials, n_jobs=n_jobs, threads_per_fit=threads_per_fit)
+        search_cv.fit(X_train_resampled, y_train_resampled)
+        print(f"{search} search: {len(search_cv.cv_results_['params'])} trials in {time.perf_counter() - mark:.1f}s")
+        clf = search_cv.best_estimator_
+        best_params = dict(search_cv.best_params_, n_estimators=clf.n_estimators)
+        trials = search_trials(search_cv.cv_results_)
     else:
         clf = LGBMClassifier(
             n_estimators=100,
@@ -83,6 +197,8 @@ def build_model(tune: bool = False):
         )
         clf.fit(X_train_resampled, y_train_resampled)
         best_params = clf.get_params()
+        trials = None
+    end_phase("fit")
 
     # Evaluate the model
     y_pred = clf.predict(X_test)
@@ -93,19 +209,29 @@ def build_model(tune: bool = False):
     print(classification_report(y_test, y_pred, target_names=encoder.classes_))
     print("Before SMOTE:", Counter(y_train))
     print("After SMOTE:", Counter(y_train_resampled))
+    end_phase("eval")
 
-    # Visuals
-    plot_feature_importance(clf.feature_importances_, X.columns)
-    plot_confusion_matrix(y_test, y_pred, encoder.classes_)
-
-    # Log training results
-    log_training_result(accuracy, best_params, dict(zip(X.columns, clf.feature_importances_)), f1)
+    # Save model + encoder for prediction routes (and archive them under the run ID)
+    artifact_version = save_model_artifacts(clf, encoder, list(X.columns), run_id=run_id)
+    try:
+        export_compiled_model(clf, artifact_version, X_test.to_numpy(dtype=np.float32), run_id=run_id)
+    except ValueError as e:
+        print(f"Compiled model not exported: {e}")
+    end_phase("save")
 
-    # Save model + encoder for prediction routes
-    os.makedirs("backend/app/models", exist_ok=True)
-    joblib.dump(clf, "backend/app/models/lightgbm_model.pkl")
-    joblib.dump(encoder, "backend/app/models/label_encoder.pkl")
-    joblib.dump(list(X.columns), "backend/app/models/feature_list.pkl")
+    metrics = {
+        "accuracy": accuracy,
+        "f1_weighted": f1,
+        "n_train": len(X_train),
+        "n_train_resampled": len(X_train_resampled),
+        "n_test": len(X_test),
+    }
+    if tune:
+        metrics["cv_best_score"] = search_cv.best_score_
+    log_training_result(
+        run_id, best_params, metrics, dict(zip(X.columns, clf.feature_importances_)),
+        phases=phases, tuned=tune, search=search, artifact_version=artifact_version, trials=trials
+    )
 
     return {
         "model": clf,
@@ -117,127 +243,293 @@ def build_model(tune: bool = False):
         "confusion_matrix": cm,
         "classes": encoder.classes_.tolist(),
         "best_params": best_params,
-        "feature_importance": clf.feature_importances_.tolist()
+        "feature_importance": clf.feature_importances_.tolist(),
+        "run_id": run_id,
+        "artifact_version": artifact_version,
+        "phases": phases,
+        # Everything app.visuals.render_training_report needs; charts are a separate stage
+        "report_inputs": {
+            "features": final_df[X.columns].to_numpy(),
+            "feature_names": X.columns.tolist(),
+            "feature_importance": clf.feature_importances_.tolist(),
+            "y_true": y_test.tolist(),
+            "y_pred": y_pred.tolist(),
+            "labels": encoder.classes_.tolist(),
+        }
     }
 
-def log_training_result(accuracy, params, feature_importance, f1):
-    """Append training results to CSV log."""
-    row = {
-        "Run_ID": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Model": "LightGBM",
-        "Accuracy": round(accuracy, 4),
-        "F1_Score": round(f1, 4),
-        "num_leaves": params.get("num_leaves", ""),
-        "learning_rate": params.get("learning_rate", ""),
-        "boosting_type": params.get("boosting_type", ""),
-        "max_depth": params.get("max_depth", ""),
-        "n_estimators": params.get("n_estimators", "")
-    }
+def log_training_result(run_id, params, metrics, feature_importance, **run):
+    """Record a training run in the run store; a database problem never fails the training itself."""
+    try:
+        from app.services.run_store import record_training_run
+        record_training_run(run_id, "LightGBM", params, metrics, feature_importance, **run)
+    except Exception:
+        traceback.print_exc()
 
-    for k, v in feature_importance.items():
-        row[k] = round(v, 4)
+def optimize_team(team_list: list[str]):
+    """Predict difficulty for each Pokémon in the team, in the order given."""
+    result = optimize_team_batch([team_list])["results"][0]
+    if "error" in result:
+        raise ValueError(result["error"])
+    return result["optimized"]
+
+def resolve_team(team_list: list[str], roster):
+    """Map a team to roster row positions in the order given; returns (names, rows, error)."""
+    team, rows, unknown = roster.lookup(team_list)
+    if not team:
+        return team, None, "Team is empty"
+
+    if unknown:
+        return team, None, f"Missing data for: {', '.join(unknown)}"
+
+    duplicates = sorted({name for name in team if team.count(name) > 1})
+    if duplicates:
+        return team, None, f"Duplicate Pokémon: {', '.join(duplicates)}"
+
+    return team, rows, None
+
+def predict_difficulty_codes(artifacts, X: np.ndarray) -> np.ndarray:
+    """Encoded difficulty of each float32 feature row, through the compiled trees when loaded."""
+    compiled = artifacts.compiled
+    if compiled is None:
+        return artifacts.model.predict(pd.DataFrame(X, columns=artifacts.features))
+    if len(X) > COMPILED_MAX_ROWS:
+        from app.services.compiled_model import booster_probabilities
+        return compiled.classes[booster_probabilities(artifacts.model, X).argmax(axis=1)]
+    return compiled.predict(X)
+
+def optimize_team_batch(teams: list[list[str]], snapshot=None, artifacts=None):
+    """
+    Predict difficulty for many teams with a single model call over the stacked
+    rows, against the given snapshot and model (the current ones by default).
+    """
+    roster = get_roster_index(snapshot or get_snapshot())
+    artifacts = artifacts or get_model_artifacts()
+    encoder, expected_features = artifacts.encoder, artifacts.features
+
+    results = []
+    rows = []
+    for team_list in teams:
+        team, team_rows, error = resolve_team(team_list, roster)
+        results.append({"team": team, "error": error} if error else {"team": team})
+        if team_rows:
+            rows.extend(team_rows)
+
+    if rows:
+        # Missing expected feature columns are filled with 0
+        with stage("features"):
+            X = roster.feature_rows(rows, expected_features)
+        with stage("predict"):
+            decoded = iter(encoder.inverse_transform(predict_difficulty_codes(artifacts, X)))
+        for result in results:
+            if "error" not in result:
+                result["optimized"] = [
+                    {"name": name, "predicted_difficulty": next(decoded)} for name in result["team"]
+                ]
+
+    return {"results": results, "model_version": artifacts.version}
 
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-    write_header = not os.path.exists(LOG_PATH)
-    with open(LOG_PATH, mode="a", newline="") as file:
-        writer = pd.DataFrame([row])
-        if write_header:
-            writer.to_csv(file, index=False)
-        else:
-            writer.to_csv(file, header=False, index=False)
+def get_cleaned_data():
+    """Return raw merged data (with feedback-enhanced stats)."""
+    _, merged_df = load_data()
+    return merged_df.to_dict(orient="records")
 
-def optimize_team(team_list: list[str]):
-    final_df, df = load_data()
-    clf, encoder, expected_features = load_model()
+# Currently served synergy model: {"model", "features", "snapshot_version", "version"},
+# where version is a content hash of the trained model, like the difficulty model's.
+# Replaced as a whole (never mutated) so readers always see a consistent bundle.
+_synergy_bundle = None
+_synergy_lock = threading.Lock()
+_synergy_refreshing = threading.Event()
+# Minimum seconds between background retrains; the stale model serves meanwhile
+SYNERGY_RETRAIN_SECONDS = float(os.getenv("SYNERGY_RETRAIN_SECONDS", "60"))
+_synergy_retrained_at = None  # time.monotonic() of the last background retrain
+
+def train_synergy_model(snapshot):
+    """Train the synergy RandomForestRegressor for a dataset snapshot and persist it."""
+    from sklearn.ensemble import RandomForestRegressor
 
-    # Fill any missing expected feature columns with 0
-    for col in expected_features:
-        if col not in final_df.columns:
-            final_df[col] = 0
+    table = get_synergy_table(snapshot)
+    roster = get_roster_index(snapshot)
+    synergy_features = SYNERGY_INDIVIDUAL_FEATURES + SYNERGY_TEAM_FEATURES + synergy_categorical_features(roster.feature_columns)
+
+    # Train a regressor across all Pokémon data (single-entry team simulation),
+    # plus the compositions players have actually reported
+    teams = [[row] for row in range(len(table.names))]
+    y = list(snapshot.merged_df["AdjustedWinRate"].to_numpy())
+    with session_scope() as db:
+        records = get_team_records(db, SYNERGY_TEAM_MIN_GAMES, MAX_SYNERGY_TEAMS)
+    for members, wins, losses in records:
+        rows = [roster.position(name) for name in members]
+        if None in rows or len(rows) > MAX_TEAM_SIZE:
+            continue
+        prior = float(table.winrate[rows].mean())
+        teams.append(rows)
+        y.append((wins + SYNERGY_TEAM_PRIOR_GAMES * prior) / (wins + losses + SYNERGY_TEAM_PRIOR_GAMES))
+
+    X = pd.DataFrame(build_synergy_inputs(table, pad_teams(teams), synergy_features), columns=synergy_features)
+    if len(teams) > len(table.names):
+        print(f"Synergy model: {len(teams) - len(table.names)} recorded teams added to the training data")
 
-    df["Name"] = df["Name"].astype(str)
-    team_list = [normalize_name(name) for name in team_list]
-    mask = df["Name"].isin(team_list)
-    team_df = df[mask]
-    X_team = final_df.loc[mask, expected_features]
+    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    model.fit(X, y)
 
-    if team_df.empty or len(team_df) != len(team_list):
-        missing = set(team_list) - set(team_df["Name"])
-        raise ValueError(f"Missing data for: {', '.join(missing)}")
+    bundle = {"model": model, "features": synergy_features, "snapshot_version": snapshot.version}
+    bundle["version"] = synergy_model_version(bundle)
 
-    preds = clf.predict(X_team)
-    decoded = encoder.inverse_transform(preds)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    dump_atomic(bundle, SYNERGY_MODEL_PATH)
+    return bundle
 
-    return [{"name": name, "predicted_difficulty": diff} for name, diff in zip(team_df["Name"], decoded)]
+def synergy_model_version(bundle) -> str:
+    """
+    Content hash of a synergy bundle's model and features. Computed once when
+    the model is trained and saved with it: a pickle round trip can change the bytes.
+    """
+    digest = hashlib.sha1(pickle.dumps((bundle["model"], bundle["features"]), protocol=4))
+    return digest.hexdigest()[:12]
+
+def _load_persisted_synergy_model():
+    if not os.path.exists(SYNERGY_MODEL_PATH):
+        return None
+    try:
+        bundle = joblib.load(SYNERGY_MODEL_PATH)
+    except Exception:
+        traceback.print_exc()
+        return None
+    if "version" not in bundle:
+        # Saved before bundles carried their version
+        bundle["version"] = synergy_model_version(bundle)
+    return bundle
+
+def _refresh_synergy_model(snapshot):
+    global _synergy_bundle
+    try:
+        bundle = train_synergy_model(snapshot)
+        with _synergy_lock:
+            _synergy_bundle = bundle
+        print(f"Synergy model retrained for snapshot {snapshot.version}")
+    except Exception:
+        traceback.print_exc()
+    finally:
+        _synergy_refreshing.clear()
+
+def get_synergy_model(snapshot):
+    """
+    Return the synergy model bundle for a snapshot.
 
-def get_cleaned_data():
-    """Return raw merged data (with feedback-enhanced stats)."""
-    _, merged_df = load_data()
-    return merged_df.to_dict(orient="records")
+    Loads the persisted artifact once per process. When the snapshot has
+    changed since the model was trained, the stale model keeps serving while a
+    background thread retrains and swaps the new one in, at most once per
+    SYNERGY_RETRAIN_SECONDS.
+    """
+    global _synergy_bundle, _synergy_retrained_at
+    bundle = _synergy_bundle
+    if bundle is not None and bundle["snapshot_version"] == snapshot.version:
+        return bundle
+
+    with _synergy_lock:
+        if _synergy_bundle is None:
+            with stage("model_load"):
+                _synergy_bundle = _load_persisted_synergy_model()
+        if _synergy_bundle is None:
+            # Nothing to serve yet: train in the foreground once
+            _synergy_bundle = train_synergy_model(snapshot)
+        bundle = _synergy_bundle
+
+    due = _synergy_retrained_at is None or time.monotonic() - _synergy_retrained_at >= SYNERGY_RETRAIN_SECONDS
+    if bundle["snapshot_version"] != snapshot.version and due and not _synergy_refreshing.is_set():
+        _synergy_refreshing.set()
+        _synergy_retrained_at = time.monotonic()
+        threading.Thread(target=_refresh_synergy_model, args=(snapshot,), daemon=True).start()
+
+    return bundle
 
 def predict_synergy_winrate(team_list: list[str]):
     """
     Predict win rate based on synergy factors of the selected team.
-    Uses RandomForestRegressor on synergy-driven features.
+    Uses the cached RandomForestRegressor trained on synergy-driven features.
     """
-    from sklearn.ensemble import RandomForestRegressor
-
-    final_df, df = load_data()
-    team_list = [normalize_name(name) for name in team_list]
-    df["Name"] = df["Name"].astype(str)
-    mask = df["Name"].isin(team_list)
-    team_df = df[mask]
-    X_team = final_df[mask]
-
-    if team_df.empty or len(team_df) != len(team_list):
-        missing = set(team_list) - set(team_df["Name"])
-        raise ValueError(f"Missing data for: {', '.join(missing)}")
-
-    # Select synergy-relevant features
-    synergy_individual_features = [
-        "AvgDifficulty", "FeedbackBoostedWinRate", "MetaImpactScore",
-        "Mobility_Offense", "Mobility_Endurance", "Support_Scoring"
-    ]
-    synergy_categorical_features = [
-        col for col in final_df.columns if col.startswith("Role_") or col.startswith("Lane_")
-    ]
-    synergy_team_features = [
-        "num_unique_roles", "most_common_role_count", "has_support",
-        "num_unique_lanes", "has_jungle", "avg_difficulty",
-        "avg_winrate", "synergy_variance"
-    ]
-    synergy_features = synergy_individual_features + synergy_team_features + synergy_categorical_features
+    result = predict_synergy_winrate_batch([team_list])[0]
+    if "error" in result:
+        raise ValueError(result["error"])
+    return result
 
-    # Train a regressor across all Pokémon data (single-entry team simulation)
-    all_synergy = []
-    for i in range(len(final_df)):
-        row = df.iloc[i:i+1]
-        indiv = final_df.iloc[i:i+1][synergy_individual_features + synergy_categorical_features]
-        team_feats = compute_synergy_features(row)
-        merged = pd.concat([indiv.reset_index(drop=True), team_feats.reset_index(drop=True)], axis=1)
-        all_synergy.append(merged)
+def predict_synergy_winrate_batch(teams: list[list[str]], snapshot=None, bundle=None):
+    """
+    Predict synergy win rates for many teams with a single model call, against
+    the given snapshot and model bundle (the current ones by default).
+    """
+    snapshot = snapshot or get_snapshot()
+    roster = get_roster_index(snapshot)
+
+    results = []
+    valid_rows = []
+    for team_list in teams:
+        team, team_rows, error = resolve_team(team_list, roster)
+        results.append({"team": team, "error": error} if error else {"team": team})
+        if team_rows:
+            valid_rows.append(team_rows)
+
+    if valid_rows:
+        bundle = bundle or get_synergy_model(snapshot)
+        model, synergy_features = bundle["model"], bundle["features"]
+        table = get_synergy_table(snapshot)
+        with stage("features"):
+            X = pd.DataFrame(
+                build_synergy_inputs(table, pad_teams(valid_rows), synergy_features),
+                columns=synergy_features
+            )
+        with stage("predict"):
+            preds = iter(model.predict(X))
+        for result in results:
+            if "error" not in result:
+                rate = round(float(next(preds)) * 100, 2)
+                result["estimated_win_rate"] = rate
+                result["individual_rates"] = [rate]
+
+    return results
+
+def cached_optimize_team(team_list: list[str]) -> dict:
+    """
+    /optimize-team answer: each member's difficulty in the order given.
+    Cached per team set, difficulty-model version and snapshot version; a
+    miss is computed with the very snapshot and model the key was read from,
+    so a reload in between can't file one model's answer under another's key.
+    """
+    snapshot = get_snapshot()
+    team, _, error = resolve_team(team_list, get_roster_index(snapshot))
+    if error:
+        raise ValueError(error)
+    artifacts = get_model_artifacts()
 
-    training_df = pd.concat(all_synergy, axis=0)
-    X = training_df[synergy_features]
-    y = df["AdjustedWinRate"]
+    def compute():
+        result = optimize_team_batch([sorted(team)], snapshot=snapshot, artifacts=artifacts)["results"][0]
+        return {entry["name"]: entry["predicted_difficulty"] for entry in result["optimized"]}
 
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X, y)
+    difficulty = OPTIMIZE_CACHE.get_or_compute((artifacts.version, snapshot.version), team, compute)
+    return {
+        "optimized": [{"name": name, "predicted_difficulty": difficulty[name]} for name in team],
+        "model_version": artifacts.version,
+    }
 
-    # Predict synergy for the actual team
-    team_indiv = X_team[synergy_individual_features + synergy_categorical_features]
-    team_avg = team_indiv.mean().to_frame().T.reset_index(drop=True)
-    synergy_df = compute_synergy_features(team_df)
-    X_input = pd.concat([team_avg, synergy_df], axis=1)[synergy_features]
+def cached_synergy_winrate(team_list: list[str]) -> dict:
+    """
+    /synergy-winrate answer, cached per team set, synergy-model version and
+    snapshot version. Misses score the sorted team, so a hit and a miss agree
+    to the last bit whatever order the members came in, with the same snapshot
+    and bundle the key was read from.
+    """
+    snapshot = get_snapshot()
+    team, _, error = resolve_team(team_list, get_roster_index(snapshot))
+    if error:
+        raise ValueError(error)
+    bundle = get_synergy_model(snapshot)
 
-    team_preds = model.predict(X_input)
-    avg_win_rate = round(team_preds.mean() * 100, 2)
+    def compute():
+        return predict_synergy_winrate_batch([sorted(team)], snapshot=snapshot, bundle=bundle)[0]["estimated_win_rate"]
 
-    return {
-        "team": team_list,
-        "estimated_win_rate": avg_win_rate,
-        "individual_rates": [round(p * 100, 2) for p in team_preds]
-    }
+    rate = SYNERGY_CACHE.get_or_compute((bundle["version"], snapshot.version), team, compute)
+    return {"team": team, "estimated_win_rate": rate, "individual_rates": [rate]}
 
 def compute_synergy_features(team_df: pd.DataFrame) -> pd.DataFrame:
     """Aggregate synergy-level stats for a given team."""
@@ -259,22 +551,31 @@ def compute_synergy_features(team_df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame([features])
 
 def load_model():
-    """Load pretrained LightGBM model, label encoder, and feature list."""
-    MODEL_DIR = os.path.join(os.path.dirname(__file__), "../models")
-
-    model_path = os.path.join(MODEL_DIR, "lightgbm_model.pkl")
-    encoder_path = os.path.join(MODEL_DIR, "label_encoder.pkl")
-    features_path = os.path.join(MODEL_DIR, "feature_list.pkl")
-
-    if not all(os.path.exists(p) for p in [model_path, encoder_path, features_path]):
-        raise FileNotFoundError("Model, encoder, or feature list not found.")
-
-    model = joblib.load(model_path)
-    encoder = joblib.load(encoder_path)
-    features = joblib.load(features_path)
-
-    return model, encoder, features
+    """Return the pretrained LightGBM model, label encoder, and feature list (loaded once per process)."""
+    artifacts = get_model_artifacts()
+    return artifacts.model, artifacts.encoder, artifacts.features
 
 if __name__ == "__main__":
-    result = build_model(tune=False)
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the difficulty and synergy models.")
+    parser.add_argument("--tune", action="store_true", help="run a hyperparameter search")
+    parser.add_argument("--search", choices=SEARCH_STRATEGIES, default="grid")
+    parser.add_argument("--n-trials", type=int, default=None, help="candidate budget for random/halving")
+    parser.add_argument("--n-jobs", type=int, default=None, help="parallel candidates (default: all cores)")
+    parser.add_argument("--threads-per-fit", type=int, default=THREADS_PER_FIT)
+    parser.add_argument("--no-charts", action="store_true", help="skip rendering the training charts")
+    args = parser.parse_args()
+
+    result = build_model(
+        tune=args.tune,
+        search=args.search,
+        n_trials=args.n_trials,
+        n_jobs=args.n_jobs,
+        threads_per_fit=args.threads_per_fit
+    )
+    train_synergy_model(get_snapshot())
     print("✅ Model training complete.")
+
+    if not args.no_charts:
+        from app.visuals import render_training_report
+        render_training_report(result["run_id"], result["report_inputs"])
@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fastapi.encoders import jsonable_encoder
+
+from app.data.loader import per_snapshot
+from app.metrics import timed_stage
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are served without it
+    brotli = None
+
+# Query parameter -> merged_df column usable as a /data-preview filter
+PREVIEW_FILTERS = {"role": "Role", "tier": "Tier", "style": "Style", "lane": "PreferredLane"}
+
+# Frontend spellings that differ from the dataset's
+FILTER_ALIASES = {"supporter": "support"}
+
+# Browsers may reuse a preview this long before revalidating it with If-None-Match
+PREVIEW_MAX_AGE = int(os.getenv("DATA_PREVIEW_MAX_AGE", "60"))
+MAX_PREVIEW_VARIANTS = 64
+
+
+@dataclass(frozen=True)
+class PreviewBody:
+    """One serialized slice of the preview with its precompressed encodings."""
+    etag: str
+    encodings: dict    # "identity" / "gzip" / "br" -> bytes
+
+    def etag_for(self, encoding: str) -> str:
+        # Each encoding is its own representation, so it gets its own strong tag
+        return self.etag if encoding == "identity" else self.etag[:-1] + f'-{encoding}"'
+
+
+@timed_stage("serialize")
+def encode_body(records: list) -> PreviewBody:
+    # Same settings as Starlette's JSONResponse, so the bytes match the old endpoint
+    body = json.dumps(records, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    encodings = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body)
+    return PreviewBody(etag='"' + hashlib.sha1(body).hexdigest()[:20] + '"', encodings=encodings)
+
+
+@dataclass
+class PreviewCache:
+    """Serialized /data-preview responses for one dataset snapshot."""
+    columns: list
+    records: list            # JSON-ready row dicts, in snapshot order
+    filter_rows: dict        # filter param -> lowercased value -> row positions
+    full: PreviewBody
+    variants: OrderedDict = field(default_factory=OrderedDict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def select(self, fields: tuple = (), filters: dict = None) -> PreviewBody:
+        """
+        Body for a column projection and/or row filter, serialized on first use.
+
+        `fields` is a tuple of column names (empty = all); `filters` maps filter
+        params to tuples of accepted values (matched case-insensitively).
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v}
+        if not fields and not filters:
+            return self.full
+
+        unknown = [name for name in fields if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        key = (fields, tuple(sorted(filters.items())))
+        with self.lock:
+            if key in self.variants:
+                self.variants.move_to_end(key)
+                return self.variants[key]
+
+        rows = range(len(self.records))
+        for param, values in filters.items():
+            index = self.filter_rows[param]
+            allowed = set()
+            for value in values:
+                value = value.lower()
+                allowed.update(index.get(FILTER_ALIASES.get(value, value), ()))
+            rows = [row for row in rows if row in allowed]
+
+        records = [self.records[row] for row in rows]
+        if fields:
+            records = [{name: record[name] for name in fields} for record in records]
+        body = encode_body(records)
+
+        with self.lock:
+            self.variants[key] = body
+            if len(self.variants) > MAX_PREVIEW_VARIANTS:
+                self.variants.popitem(last=False)
+        return body
+
+
+@per_snapshot
+def get_preview_cache(snapshot) -> PreviewCache:
+    """Serialize the snapshot's merged data once, with row indexes for the filters."""
+    merged_df = snapshot.merged_df
+    records = jsonable_encoder(merged_df.to_dict(orient="records"))
+
+    filter_rows = {}
+    for param, column in PREVIEW_FILTERS.items():
+        index = {}
+        for row, value in enumerate(merged_df[column]):
+            index.setdefault(str(value).lower(), []).append(row)
+        filter_rows[param] = index
+
+    return PreviewCache(
+        columns=merged_df.columns.tolist(),
+        records=records,
+        filter_rows=filter_rows,
+        full=encode_body(records),
+    )
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Best precomputed encoding the client accepts: br, then gzip, else identity."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
@@ -0,0 +1,196 @@
+import os
+import hashlib
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+import joblib
+
+from app.metrics import timed_stage
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "../models")
+MODEL_PATH = os.path.join(MODEL_DIR, "lightgbm_model.pkl")
+ENCODER_PATH = os.path.join(MODEL_DIR, "label_encoder.pkl")
+FEATURES_PATH = os.path.join(MODEL_DIR, "feature_list.pkl")
+# The model's trees as NumPy arrays, exported next to it (see compiled_model.py)
+COMPILED_MODEL_PATH = os.path.join(MODEL_DIR, "lightgbm_model.npz")
+
+# Written in this order, model last, so a reader that sees a new model also sees its encoder/features
+ARTIFACT_PATHS = [FEATURES_PATH, ENCODER_PATH, MODEL_PATH]
+
+# Every training run's artifacts are also kept here, so any run can be promoted later
+RUN_MODEL_DIR = os.path.join(MODEL_DIR, "runs")
+
+# "lightgbm" predicts through the sklearn wrapper; "compiled" walks the exported
+# trees in NumPy, which is much cheaper for the few rows of a request.
+DIFFICULTY_INFERENCE = os.getenv("DIFFICULTY_INFERENCE", "lightgbm").lower()
+if DIFFICULTY_INFERENCE not in ("lightgbm", "compiled"):
+    raise ValueError(f"DIFFICULTY_INFERENCE must be lightgbm or compiled, not {DIFFICULTY_INFERENCE!r}")
+
+
+@dataclass(frozen=True)
+class ModelArtifacts:
+    """One consistent, loaded set of difficulty-model artifacts."""
+    model: object
+    encoder: object
+    features: list
+    version: str          # short content hash of the three artifact files
+    signature: tuple      # (mtime_ns, size) per file, used to detect changes cheaply
+    loaded_at: str
+    compiled: object = None   # CompiledModel with DIFFICULTY_INFERENCE=compiled, if the model compiles
+
+
+_artifacts = None
+_artifacts_lock = threading.Lock()
+
+
+def _signature():
+    if not all(os.path.exists(p) for p in ARTIFACT_PATHS):
+        raise FileNotFoundError("Model, encoder, or feature list not found.")
+    stats = [os.stat(p) for p in ARTIFACT_PATHS]
+    return tuple((st.st_mtime_ns, st.st_size) for st in stats)
+
+
+def _content_hash(paths=ARTIFACT_PATHS):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:12]
+
+
+@timed_stage("model_load")
+def _load(signature) -> ModelArtifacts:
+    version = _content_hash()
+    model = joblib.load(MODEL_PATH)
+    encoder = joblib.load(ENCODER_PATH)
+    features = joblib.load(FEATURES_PATH)
+
+    n_features = getattr(model, "n_features_in_", len(features))
+    if n_features != len(features):
+        raise ValueError(f"Model expects {n_features} features but feature list has {len(features)}")
+
+    return ModelArtifacts(
+        model=model,
+        encoder=encoder,
+        features=features,
+        version=version,
+        signature=signature,
+        loaded_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        compiled=_load_compiled(model, version) if DIFFICULTY_INFERENCE == "compiled" else None,
+    )
+
+
+def _load_compiled(model, version: str):
+    """
+    The exported trees of `version`, or, when the file is missing or from
+    another version, the model compiled and checked now. None if the model
+    can't be compiled, in which case requests go through LightGBM.
+    """
+    from app.services.compiled_model import load_compiled_model
+
+    try:
+        if os.path.exists(COMPILED_MODEL_PATH):
+            compiled = load_compiled_model(COMPILED_MODEL_PATH)
+            if compiled.version == version:
+                return compiled
+        return export_compiled_model(model, version)
+    except (ValueError, KeyError) as e:
+        print(f"Serving difficulty model {version} through LightGBM; compiling failed: {e}")
+        return None
+
+
+def get_model_artifacts() -> ModelArtifacts:
+    """
+    Return the loaded difficulty-model artifacts, reloading them when the files change.
+
+    Each call costs three `stat`s. A reload swaps the whole set in one assignment;
+    if the new files are incomplete or inconsistent, the previous set keeps serving.
+    """
+    global _artifacts
+    signature = _signature()
+    artifacts = _artifacts
+    if artifacts is not None and artifacts.signature == signature:
+        return artifacts
+
+    with _artifacts_lock:
+        if _artifacts is not None and _artifacts.signature == signature:
+            return _artifacts
+        try:
+            _artifacts = _load(signature)
+            print(f"Loaded difficulty model {_artifacts.version}")
+        except Exception as e:
+            if _artifacts is None:
+                raise
+            print(f"Keeping difficulty model {_artifacts.version}; reload failed: {e}")
+        return _artifacts
+
+
+def dump_atomic(value, path):
+    """joblib.dump to a temp file, then rename, so readers never see a half-written artifact."""
+    # Per process: model pool workers may each retrain and write the same artifact
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(value, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def run_artifact_paths(run_id: str, paths=ARTIFACT_PATHS) -> list:
+    """Archived artifact paths of a training run, in ARTIFACT_PATHS order."""
+    run_dir = os.path.join(RUN_MODEL_DIR, run_id)
+    return [os.path.join(run_dir, os.path.basename(path)) for path in paths]
+
+
+def export_compiled_model(model, version: str, X=None, run_id: str = None):
+    """
+    Compile the model's trees, check them against LightGBM on `X` and random
+    rows, and write them to COMPILED_MODEL_PATH (and the run's archive).
+    Raises ValueError if the model can't be compiled or the outputs differ.
+    """
+    from app.services.compiled_model import check_parity, compile_model, save_compiled_model
+
+    compiled = compile_model(model, version)
+    gap = check_parity(compiled, model, X)
+    print(f"Compiled difficulty model {version}: {len(compiled.roots)} trees, max probability gap {gap:.1e}")
+
+    try:
+        save_compiled_model(compiled, COMPILED_MODEL_PATH)
+        if run_id is not None:
+            save_compiled_model(compiled, run_artifact_paths(run_id, [COMPILED_MODEL_PATH])[0])
+    except OSError as e:
+        print(f"Could not write the compiled difficulty model: {e}")
+    return compiled
+
+
+def save_model_artifacts(model, encoder, features: list, run_id: str = None) -> str:
+    """
+    Publish a new set of artifacts; running workers pick it up on their next request.
+    With `run_id`, the set is also archived for `promote_model_artifacts`. Returns its version.
+    """
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    for value, path in zip([features, encoder, model], ARTIFACT_PATHS):
+        dump_atomic(value, path)
+
+    if run_id is not None:
+        archived = run_artifact_paths(run_id)
+        os.makedirs(os.path.dirname(archived[0]), exist_ok=True)
+        for source, target in zip(ARTIFACT_PATHS, archived):
+            shutil.copyfile(source, target)
+    return _content_hash()
+
+
+def promote_model_artifacts(run_id: str) -> ModelArtifacts:
+    """Serve a training run's archived artifacts again; raises FileNotFoundError if they are gone."""
+    archived = run_artifact_paths(run_id)
+    if not all(os.path.exists(p) for p in archived):
+        raise FileNotFoundError(f"No archived artifacts for training run {run_id}")
+
+    for source, target in zip(archived, ARTIFACT_PATHS):
+        shutil.copyfile(source, target + ".tmp")
+        os.replace(target + ".tmp", target)
+
+    # Stays stale if the run has none; the compiled backend then recompiles on load
+    archived_compiled = run_artifact_paths(run_id, [COMPILED_MODEL_PATH])[0]
+    if os.path.exists(archived_compiled):
+        shutil.copyfile(archived_compiled, COMPILED_MODEL_PATH + ".tmp")
+        os.replace(COMPILED_MODEL_PATH + ".tmp", COMPILED_MODEL_PATH)
+    return get_model_artifacts()
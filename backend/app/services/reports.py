@@ -0,0 +1,65 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Set TRAINING_CHARTS=false to never render charts after training
+TRAINING_CHARTS = os.getenv("TRAINING_CHARTS", "true").lower() not in ("0", "false", "no")
+MAX_REPORTS = 50
+
+PENDING, RENDERED, FAILED = "pending", "rendered", "failed"
+
+_reports = {}
+_lock = threading.Lock()
+_executor = None
+
+
+def _render(run_id: str, inputs: dict) -> list[str]:
+    """Renderer-process entry point; matplotlib/seaborn are only ever imported there."""
+    from app.visuals import render_training_report
+    return render_training_report(run_id, inputs)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # One renderer process, so chart jobs never compete with each other for the CPU
+            _executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _done(run_id: str, future, on_done=None):
+    with _lock:
+        report = _reports.get(run_id)
+        if report is None:
+            return
+        try:
+            report.update(status=RENDERED, paths=future.result())
+        except Exception as e:
+            report.update(status=FAILED, error=f"{type(e).__name__}: {e}")
+        report = dict(report)
+    if on_done is not None:
+        on_done(report)
+
+
+def submit_training_report(run_id: str, inputs: dict, on_done=None) -> dict:
+    """
+    Render a training run's charts in the background; returns the report
+    record. `on_done(report)` is called with the final record once rendering ends.
+    """
+    report = {"run_id": run_id, "status": PENDING, "paths": [], "error": None}
+    with _lock:
+        _reports[run_id] = report
+        for old in list(_reports)[:-MAX_REPORTS]:
+            _reports.pop(old)
+    future = _get_executor().submit(_render, run_id, inputs)
+    future.add_done_callback(lambda f: _done(run_id, f, on_done))
+    return get_training_report(run_id)
+
+
+def get_training_report(run_id: str):
+    """Chart rendering status for a training run, or None if none was requested."""
+    with _lock:
+        report = _reports.get(run_id)
+        return None if report is None else dict(report)
@@ -0,0 +1,226 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.metrics import RESPONSE_CACHE_LOOKUPS
+
+# Per-worker budget for cached answers (keys and JSON values); 0 turns caching off
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+
+# Optional SQLite file shared by every worker on the host, so a team answered by
+# one worker is a hit for the others. Unset keeps each worker's cache to itself.
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SHARED_ENTRIES", "50000"))
+SHARED_CACHE_TIMEOUT = 0.05     # seconds to wait on a locked file before treating it as a miss
+SHARED_CACHE_PRUNE_EVERY = 500  # writes between trims of the shared table
+
+ENTRY_OVERHEAD = 200  # rough bytes per entry beyond its key and value (tuple, dict slot, str headers)
+
+
+class SharedStore:
+    """
+    Cached answers in a local SQLite file that every worker opens.
+
+    Entries expire by wall-clock time and the oldest are trimmed past
+    `max_entries`. The store is best-effort: a locked or broken file is a
+    miss, never a failed request.
+    """
+
+    def __init__(self, path: str, max_entries: int = SHARED_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._warned = False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SHARED_CACHE_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_expires ON response_cache (expires)")
+            self._local.connection = connection
+        return connection
+
+    def _failed(self, error: Exception):
+        if not self._warned:
+            print(f"Shared response cache {self.path} unavailable, serving from this worker only: {error}")
+            self._warned = True
+
+    def get(self, key: str):
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+        return row[0] if row else None
+
+    def put(self, key: str, value: str, ttl: float):
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % SHARED_CACHE_PRUNE_EVERY == 0:
+                self.prune(connection)
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def prune(self, connection: sqlite3.Connection):
+        connection.execute("DELETE FROM response_cache WHERE expires <= ?", (time.time(),))
+        connection.execute(
+            "DELETE FROM response_cache WHERE key IN "
+            "(SELECT key FROM response_cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def count(self):
+        try:
+            return self._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+
+
+class ResponseCache:
+    """
+    LRU cache of JSON answers keyed by a team's sorted names and generation:
+    the (model version, snapshot version) pair they were computed under. An
+    answer is never served for another generation; entries of generations no
+    longer asked for age out through the LRU and the TTL, so callers that
+    briefly see different generations don't wipe each other's entries.
+    """
+
+    def __init__(self, name: str, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 ttl: float = RESPONSE_CACHE_TTL, shared: SharedStore = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.shared = shared
+        self.entries = OrderedDict()   # key -> (monotonic expiry, JSON value, size)
+        self.size = 0
+        self.counts = {"hit": 0, "shared_hit": 0, "miss": 0}
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def _key(self, generation: tuple, names: list[str]) -> str:
+        return "|".join([self.name, *generation, *sorted(names)])
+
+    def _lookup(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def _drop(self, key: str):
+        self.size -= self.entries.pop(key)[2]
+
+    def _store(self, key: str, value: str):
+        size = len(key) + len(value) + ENTRY_OVERHEAD
+        with self.lock:
+            if size > self.max_bytes:
+                return
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.monotonic() + self.ttl, value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _count(self, result: str):
+        with self.lock:
+            self.counts[result] += 1
+        RESPONSE_CACHE_LOOKUPS.inc(self.name, result)
+
+    def get_or_compute(self, generation: tuple, names: list[str], compute):
+        """
+        The cached answer for this team set under `generation`, or `compute()`
+        (a JSON-ready value) cached for next time. Each call returns a fresh copy.
+        """
+        if self.max_bytes <= 0:
+            return compute()
+
+        key = self._key(generation, names)
+        value = self._lookup(key)
+        if value is not None:
+            self._count("hit")
+            return json.loads(value)
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self._count("shared_hit")
+                self._store(key, value)
+                return json.loads(value)
+
+        self._count("miss")
+        result = compute()
+        value = json.dumps(result, separators=(",", ":"))
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.put(key, value, self.ttl)
+        return result
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {**self.counts, "entries": len(self.entries), "bytes": self.size, "evictions": self.evictions}
+
+
+shared_store = SharedStore(RESPONSE_CACHE_PATH) if RESPONSE_CACHE_PATH else None
+OPTIMIZE_CACHE = ResponseCache("optimize-team", shared=shared_store)
+SYNERGY_CACHE = ResponseCache("synergy-winrate", shared=shared_store)
+
+
+# Latest cache stats reported by each model pool worker (see app/concurrency.py), by pid
+_worker_stats = {}
+
+
+def local_cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in (OPTIMIZE_CACHE, SYNERGY_CACHE)}
+
+
+def record_worker_cache_stats(pid: int, stats: dict):
+    _worker_stats[pid] = stats
+
+
+def forget_worker_cache_stats():
+    _worker_stats.clear()
+
+
+def cache_stats() -> dict:
+    """
+    Hit/miss counts and size of the response caches in this process and its
+    model pool workers, plus the shared store's size.
+    """
+    caches = local_cache_stats()
+    for worker in list(_worker_stats.values()):
+        for name, stats in worker.items():
+            caches[name] = {key: caches[name][key] + value for key, value in stats.items()}
+    for stats in caches.values():
+        lookups = stats["hit"] + stats["shared_hit"] + stats["miss"]
+        stats["hit_rate"] = round((stats["hit"] + stats["shared_hit"]) / lookups, 4) if lookups else None
+        stats["max_bytes"] = RESPONSE_CACHE_MAX_BYTES
+    return {
+        "ttl_seconds": RESPONSE_CACHE_TTL,
+        "workers": len(_worker_stats),
+        "caches": caches,
+        "shared": {"path": RESPONSE_CACHE_PATH, "entries": shared_store.count()} if shared_store else None,
+    }
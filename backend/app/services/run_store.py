@@ -0,0 +1,342 @@
+import argparse
+import ast
+import csv
+import json
+import math
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import and_
+
+from app.db import engine, session_scope
+from app.data.training_model import (
+    TrainingFeatureImportance,
+    TrainingJob,
+    TrainingMetric,
+    TrainingParam,
+    TrainingPhase,
+    TrainingRun,
+    TrainingTrial
+)
+
+TRAINING_TABLES = [
+    t.__table__
+    for t in (
+        TrainingRun, TrainingParam, TrainingMetric, TrainingFeatureImportance, TrainingPhase, TrainingTrial, TrainingJob
+    )
+]
+
+# Old append-only logs that `python -m app.services.run_store import-csv` can backfill from
+CSV_LOG_PATHS = [
+    os.path.join(os.path.dirname(__file__), "../data/training_log.csv"),
+    os.path.join(os.path.dirname(__file__), "../training_log.csv"),
+]
+# Per-candidate search log written by tuned runs before the training_trial table
+CSV_TRIALS_PATH = os.path.join(os.path.dirname(__file__), "../data/training_trials.csv")
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+
+def ensure_training_tables():
+    """Create the run tables once per process (training also runs outside the API, e.g. the CLI)."""
+    global _tables_ready
+    with _tables_lock:
+        if not _tables_ready:
+            TrainingRun.metadata.create_all(bind=engine, tables=TRAINING_TABLES)
+            _tables_ready = True
+
+
+def record_training_run(
+    run_id: str,
+    model: str,
+    params: dict,
+    metrics: dict,
+    feature_importance: dict,
+    phases: dict = None,
+    tuned: bool = False,
+    search: str = None,
+    artifact_version: str = None,
+    created_at: datetime = None,
+    trials: list[dict] = None
+):
+    """Store one training run and its params, metrics, feature importances, phase timings and search trials."""
+    ensure_training_tables()
+    with session_scope() as db:
+        run = TrainingRun(
+            run_id=run_id,
+            model=model,
+            tuned=tuned,
+            search=search if tuned else None,
+            artifact_version=artifact_version,
+            created_at=created_at or datetime.now(),
+        )
+        db.add(run)
+        db.flush()
+
+        db.add_all([TrainingParam(run=run.id, name=k, value=json.dumps(v, default=str)) for k, v in params.items()])
+        db.add_all([TrainingMetric(run=run.id, name=k, value=_float(v)) for k, v in metrics.items()])
+        db.add_all([
+            TrainingFeatureImportance(run=run.id, feature=k, importance=float(v))
+            for k, v in feature_importance.items()
+        ])
+        db.add_all([TrainingPhase(run=run.id, phase=k, seconds=round(float(v), 4)) for k, v in (phases or {}).items()])
+        _add_trials(db, run.id, trials or [])
+        db.commit()
+
+
+def _add_trials(db, run: int, trials: list[dict]):
+    db.add_all([
+        TrainingTrial(
+            run=run,
+            trial=i,
+            iteration=int(t.get("iteration") or 0),
+            resources=None if t.get("resources") in (None, "") else int(t["resources"]),
+            params=json.dumps(t["params"], default=str),
+            mean_fit_time=_float(t.get("mean_fit_time")),
+            mean_score_time=_float(t.get("mean_score_time")),
+            mean_test_score=_float(t.get("mean_test_score")),
+            rank=None if t.get("rank") in (None, "") else int(t["rank"]),
+        )
+        for i, t in enumerate(trials)
+    ])
+
+
+def _float(value):
+    return None if value is None or math.isnan(float(value)) else float(value)
+
+
+def _serving_version():
+    from app.services.registry import get_model_artifacts
+    try:
+        return get_model_artifacts().version
+    except FileNotFoundError:
+        return None
+
+
+def _details(db, runs: list, detail: bool) -> list[dict]:
+    ids = [run.id for run in runs]
+    serving = _serving_version()
+    records = {
+        run.id: {
+            "run_id": run.run_id,
+            "model": run.model,
+            "tuned": run.tuned,
+            "search": run.search,
+            "created_at": run.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "artifact_version": run.artifact_version,
+            "serving": run.artifact_version is not None and run.artifact_version == serving,
+            "metrics": {},
+            "phases": {},
+        }
+        for run in runs
+    }
+
+    for row in db.query(TrainingMetric).filter(TrainingMetric.run.in_(ids)):
+        records[row.run]["metrics"][row.name] = row.value
+    for row in db.query(TrainingPhase).filter(TrainingPhase.run.in_(ids)):
+        records[row.run]["phases"][row.phase] = row.seconds
+
+    if detail:
+        for record in records.values():
+            record.update(params={}, feature_importance={})
+        for row in db.query(TrainingParam).filter(TrainingParam.run.in_(ids)):
+            records[row.run]["params"][row.name] = None if row.value is None else json.loads(row.value)
+        for row in db.query(TrainingFeatureImportance).filter(TrainingFeatureImportance.run.in_(ids)):
+            records[row.run]["feature_importance"][row.feature] = row.importance
+        for record in records.values():
+            record["trials"] = []
+        for row in db.query(TrainingTrial).filter(TrainingTrial.run.in_(ids)).order_by(TrainingTrial.trial):
+            records[row.run]["trials"].append({
+                "iteration": row.iteration,
+                "resources": row.resources,
+                "params": json.loads(row.params),
+                "mean_fit_time": row.mean_fit_time,
+                "mean_score_time": row.mean_score_time,
+                "mean_test_score": row.mean_test_score,
+                "rank": row.rank,
+            })
+
+    return [records[run.id] for run in runs]
+
+
+def list_training_runs(limit: int = 50, order_by: str = None) -> list[dict]:
+    """
+    Most recent runs with their metrics and phase timings. With `order_by`
+    (a metric name), the best runs by that metric instead; runs without it are left out.
+    """
+    ensure_training_tables()
+    with session_scope() as db:
+        query = db.query(TrainingRun)
+        if order_by:
+            query = query.join(
+                TrainingMetric, and_(TrainingMetric.run == TrainingRun.id, TrainingMetric.name == order_by)
+            ).order_by(TrainingMetric.value.desc(), TrainingRun.created_at.desc())
+        else:
+            query = query.order_by(TrainingRun.created_at.desc(), TrainingRun.id.desc())
+        return _details(db, query.limit(limit).all(), detail=False)
+
+
+def get_training_runs(run_ids: list[str]) -> list[dict]:
+    """Full records (params, feature importances and search trials included) for the given runs, in that order."""
+    ensure_training_tables()
+    with session_scope() as db:
+        runs = {run.run_id: run for run in db.query(TrainingRun).filter(TrainingRun.run_id.in_(run_ids))}
+        missing = [run_id for run_id in run_ids if run_id not in runs]
+        if missing:
+            raise KeyError(f"Unknown training runs: {', '.join(missing)}")
+        return _details(db, [runs[run_id] for run_id in run_ids], detail=True)
+
+
+def compare_training_runs(run_ids: list[str]) -> dict:
+    """Params, metrics, phase timings and importances pivoted to {name: {run_id: value}}."""
+    runs = get_training_runs(run_ids)
+
+    def pivot(section):
+        table = {}
+        for run in runs:
+            for name, value in run[section].items():
+                table.setdefault(name, {})[run["run_id"]] = value
+        return table
+
+    return {
+        "runs": [{k: v for k, v in run.items() if k not in ("params", "metrics", "phases", "feature_importance", "trials")} for run in runs],
+        "metrics": pivot("metrics"),
+        "params": pivot("params"),
+        "phases": pivot("phases"),
+        "feature_importance": pivot("feature_importance"),
+    }
+
+
+PARAM_COLUMNS = {"num_leaves", "learning_rate", "boosting_type", "max_depth", "n_estimators"}
+METRIC_COLUMNS = {"accuracy": "accuracy", "f1_score": "f1_weighted"}
+
+
+def _csv_value(value: str):
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and "." not in value else number
+
+
+def import_csv_log(path: str) -> int:
+    """
+    Backfill runs from an old training_log.csv; rows already imported are skipped.
+
+    The old logs appended rows with whatever feature columns each run had under
+    a header written once, so feature importances are only kept for rows whose
+    width still matches the header. Params and metrics come first and are stable.
+    """
+    with open(path, newline="") as file:
+        header, *rows = list(csv.reader(file))
+    source = os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+    ensure_training_tables()
+    with session_scope() as db:
+        known = {run_id for (run_id,) in db.query(TrainingRun.run_id)}
+
+    imported = 0
+    for i, values in enumerate(rows):
+        row = dict(zip(header, values))
+        run_id = row.get("Run_ID") or f"csv-{source}-{i}"
+        if not values or run_id in known:
+            continue
+
+        params, metrics, importance = {}, {}, {}
+        for column, value in row.items():
+            key = column.lower()
+            if column in ("Run_ID", "Model") or value == "":
+                continue
+            if key in PARAM_COLUMNS:
+                params[key] = _csv_value(value)
+            elif key in METRIC_COLUMNS:
+                metrics[METRIC_COLUMNS[key]] = float(value)
+            elif len(values) == len(header):
+                importance[column] = float(value)
+
+        created_at = None
+        if "Run_ID" in row:
+            try:
+                created_at = datetime.strptime(run_id, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                pass
+
+        record_training_run(
+            run_id=run_id,
+            model=row.get("Model") or "unknown",
+            params=params,
+            metrics=metrics,
+            feature_importance=importance,
+            created_at=created_at,
+        )
+        known.add(run_id)
+        imported += 1
+    return imported
+
+
+def _trial_params(value: str):
+    # The CSV log stored each candidate as repr(dict)
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def import_csv_trials(path: str) -> int:
+    """
+    Backfill search trials from the old training_trials.csv. Trials are attached
+    to runs already in the store (import the run logs first); runs that already
+    have trials are skipped. Returns the number of trials imported.
+    """
+    with open(path, newline="") as file:
+        rows = list(csv.DictReader(file))
+
+    by_run = {}
+    for row in rows:
+        by_run.setdefault(row["Run_ID"], []).append({
+            "iteration": row.get("Iteration"),
+            "resources": row.get("Resources"),
+            "params": _trial_params(row["Params"]),
+            "mean_fit_time": row.get("Mean_Fit_Time") or None,
+            "mean_score_time": row.get("Mean_Score_Time") or None,
+            "mean_test_score": row.get("Mean_Test_Score") or None,
+            "rank": row.get("Rank"),
+        })
+
+    ensure_training_tables()
+    imported = 0
+    with session_scope() as db:
+        runs = dict(db.query(TrainingRun.run_id, TrainingRun.id).filter(TrainingRun.run_id.in_(list(by_run))))
+        done = {run for (run,) in db.query(TrainingTrial.run).filter(TrainingTrial.run.in_(list(runs.values()))).distinct()}
+        for run_id, trials in by_run.items():
+            if run_id not in runs:
+                print(f"⚠️ Skipping trials of unknown run {run_id}")
+            elif runs[run_id] not in done:
+                _add_trials(db, runs[run_id], trials)
+                imported += len(trials)
+        db.commit()
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the training run tables.")
+    parser.add_argument("command", choices=["import-csv", "list"])
+    parser.add_argument(
+        "paths", nargs="*", help="CSV logs to import (default: both training_log.csv files, then training_trials.csv)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "import-csv":
+        for path in args.paths or CSV_LOG_PATHS + [CSV_TRIALS_PATH]:
+            if not os.path.exists(path):
+                continue
+            with open(path, newline="") as file:
+                header = next(csv.reader(file), [])
+            if "Mean_Test_Score" in header:
+                print(f"✅ Imported {import_csv_trials(path)} trials from {path}")
+            else:
+                print(f"✅ Imported {import_csv_log(path)} runs from {path}")
+    else:
+        for run in list_training_runs():
+            print(run["run_id"], run["model"], run["metrics"], "(serving)" if run["serving"] else "")
@@ -0,0 +1,169 @@
+import copy
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+import pandas as pd
+
+from app.data.loader import get_snapshot
+from app.data.roster import get_roster_index
+from app.metrics import stage
+from app.services.model import get_synergy_model, resolve_team
+from app.services.synergy import MAX_TEAM_SIZE, build_synergy_inputs, get_synergy_table, pad_teams
+
+# Mirrors roleToLane in the frontend's utils/synergy.js; used when the data has no PreferredLane
+ROLE_TO_LANE = {
+    "Attacker": "Top",
+    "Defender": "Top",
+    "All-Rounder": "Bottom",
+    "Support": "Bottom",
+    "Supporter": "Bottom",
+    "Speedster": "Jungle",
+}
+
+BEAM_WIDTH = 32
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def pokemon_lanes(roster) -> list[str]:
+    """PreferredLane when known, otherwise the lane recommended for the Pokémon's role."""
+    return [
+        lane if lane not in ("Unknown", 0, None) else ROLE_TO_LANE.get(role, "Jungle")
+        for lane, role in zip(roster.labels("PreferredLane"), roster.labels("Role"))
+    ]
+
+
+def _shortfall(members, roles, lanes, need_roles: Counter, need_lanes: Counter) -> int:
+    """Lower bound on how many more picks are needed to satisfy the role/lane requirements."""
+    have_roles = Counter(roles[i] for i in members)
+    have_lanes = Counter(lanes[i] for i in members)
+    missing_roles = sum(max(0, count - have_roles[role]) for role, count in need_roles.items())
+    missing_lanes = sum(max(0, count - have_lanes[lane]) for lane, count in need_lanes.items())
+    return max(missing_roles, missing_lanes)
+
+
+def _score(model, features, table, teams) -> np.ndarray:
+    with stage("features"):
+        X = pd.DataFrame(build_synergy_inputs(table, pad_teams(teams), features), columns=features)
+    with stage("predict"):
+        return model.predict(X)
+
+
+def suggest_teams(
+    team: list[str],
+    banned: list[str] = (),
+    required_roles: list[str] = (),
+    required_lanes: list[str] = (),
+    stack_size: int = MAX_TEAM_SIZE,
+    top_k: int = 5,
+    beam_width: int = BEAM_WIDTH,
+):
+    """
+    Return the top-K completions of a partial team ranked by the synergy model.
+
+    Uses beam search: each step extends the best `beam_width` partial teams by
+    one allowed Pokémon, drops any team that can no longer meet the role/lane
+    requirements in the slots left, and keeps the highest-scoring extensions.
+    Results are memoized per (partial team, constraints, model version,
+    snapshot version). Raises ValueError for unknown names, roles or lanes
+    and for a banned Pokémon that is already on the team.
+    """
+    snapshot = get_snapshot()
+    table = get_synergy_table(snapshot)
+    roster = get_roster_index(snapshot)
+    bundle = get_synergy_model(snapshot)
+    model, features = bundle["model"], bundle["features"]
+
+    if team:
+        partial, rows, error = resolve_team(team, roster)
+        if error:
+            raise ValueError(error)
+    else:
+        partial, rows = [], []
+
+    banned, _, unknown_banned = roster.lookup(banned)
+    if unknown_banned:
+        raise ValueError(f"Missing data for: {', '.join(unknown_banned)}")
+    banned = set(banned)
+    conflicts = sorted(banned.intersection(partial))
+    if conflicts:
+        raise ValueError(f"Banned Pokémon already on the team: {', '.join(conflicts)}")
+
+    slots = stack_size - len(rows)
+    if slots < 0:
+        raise ValueError(f"Team already has more than {stack_size} Pokémon")
+
+    roles = roster.labels("Role")
+    lanes = pokemon_lanes(roster)
+    # A misspelt requirement would make every completion infeasible
+    for kind, required, known in (("role", required_roles, roles), ("lane", required_lanes, lanes)):
+        unknown = sorted(set(required) - set(known))
+        if unknown:
+            raise ValueError(f"Unknown {kind}: {', '.join(unknown)} (known: {', '.join(sorted(set(known)))})")
+
+    # The roster and tables come from the current snapshot, which can be newer
+    # than the one the synergy model was trained on while it retrains
+    key = (
+        tuple(sorted(partial)), tuple(sorted(banned)), tuple(sorted(required_roles)),
+        tuple(sorted(required_lanes)), stack_size, top_k, beam_width, bundle["version"], snapshot.version
+    )
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            # Callers may edit the response; the memoized copy must stay as computed
+            return copy.deepcopy(_cache[key])
+
+    need_roles, need_lanes = Counter(required_roles), Counter(required_lanes)
+    allowed = [i for i, name in enumerate(table.names) if name not in banned and i not in rows]
+
+    beam = [tuple(rows)]
+    scores = None
+    if slots == 0:
+        if _shortfall(beam[0], roles, lanes, need_roles, need_lanes) > 0:
+            beam = []
+        elif rows:
+            scores = _score(model, features, table, beam)
+
+    for step in range(slots):
+        remaining = slots - step - 1
+        expansions = {}
+        for state in beam:
+            taken = set(state)
+            for candidate in allowed:
+                if candidate in taken:
+                    continue
+                extended = state + (candidate,)
+                members = frozenset(extended)
+                if members in expansions:
+                    continue
+                if _shortfall(extended, roles, lanes, need_roles, need_lanes) > remaining:
+                    continue
+                expansions[members] = extended
+
+        candidates = list(expansions.values())
+        if not candidates:
+            beam = []
+            break
+
+        candidate_scores = _score(model, features, table, candidates)
+        order = np.argsort(-candidate_scores, kind="stable")[:beam_width if remaining else top_k]
+        beam = [candidates[i] for i in order]
+        scores = candidate_scores[order]
+
+    suggestions = []
+    if scores is not None:
+        for members, score in zip(beam[:top_k], scores[:top_k]):
+            suggestions.append({
+                "team": [table.names[i] for i in members],
+                "added": [table.names[i] for i in members[len(rows):]],
+                "estimated_win_rate": round(float(score) * 100, 2),
+            })
+
+    result = {"team": partial, "suggestions": suggestions, "model_version": bundle["version"]}
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return copy.deepcopy(result)
@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+import numpy as np
+
+from app.data.loader import per_snapshot
+from app.data.roster import get_roster_index
+
+# Select synergy-relevant features
+SYNERGY_INDIVIDUAL_FEATURES = [
+    "AvgDifficulty", "FeedbackBoostedWinRate", "MetaImpactScore",
+    "Mobility_Offense", "Mobility_Endurance", "Support_Scoring"
+]
+SYNERGY_TEAM_FEATURES = [
+    "num_unique_roles", "most_common_role_count", "has_support",
+    "num_unique_lanes", "has_jungle", "avg_difficulty",
+    "avg_winrate", "synergy_variance"
+]
+SYNERGY_STAT_COLUMNS = ["Offense", "Support", "Mobility", "Endurance"]
+
+# Index value used to pad teams smaller than the matrix width
+PAD = -1
+MAX_TEAM_SIZE = 5
+
+
+def synergy_categorical_features(columns: list[str]) -> list[str]:
+    return [col for col in columns if col.startswith("Role_") or col.startswith("Lane_")]
+
+
+@dataclass(frozen=True)
+class SynergyTable:
+    """
+    Per-Pokémon NumPy arrays (one row per snapshot row) used to score teams in bulk.
+
+    The team-feature inputs keep the snapshot's float64 values so batch
+    features match `compute_synergy_features` exactly; the individual
+    features are float32 like the roster they come from.
+    """
+    snapshot_version: str
+    names: list
+    role_codes: np.ndarray        # int16, roster Role codes
+    lane_codes: np.ndarray        # int16, roster PreferredLane codes
+    is_support: np.ndarray        # bool
+    is_jungle: np.ndarray         # bool
+    difficulty: np.ndarray        # float64, AvgDifficulty
+    winrate: np.ndarray           # float64, AdjustedWinRate
+    stats: np.ndarray             # float64 (n, 4), SYNERGY_STAT_COLUMNS
+    individual: np.ndarray        # float32 (n, k), individual_features
+    individual_features: list
+
+
+def build_synergy_table(snapshot) -> SynergyTable:
+    roster = get_roster_index(snapshot)
+    individual_features = SYNERGY_INDIVIDUAL_FEATURES + synergy_categorical_features(roster.feature_columns)
+
+    rows = list(range(len(roster.names)))
+
+    # Team aggregates treat missing values as 0, like the filled merged_df did
+    aggregate_columns = ["AvgDifficulty", "AdjustedWinRate"] + SYNERGY_STAT_COLUMNS
+    stats = np.nan_to_num(snapshot.final_df.reindex(columns=aggregate_columns, fill_value=0).to_numpy(dtype=np.float64))
+    return SynergyTable(
+        snapshot_version=snapshot.version,
+        names=roster.names,
+        role_codes=roster.codes["Role"],
+        lane_codes=roster.codes["PreferredLane"],
+        is_support=roster.codes["Role"] == roster.code_of("Role", "Support"),
+        is_jungle=roster.codes["PreferredLane"] == roster.code_of("PreferredLane", "Jungle"),
+        difficulty=stats[:, 0],
+        winrate=stats[:, 1],
+        stats=np.ascontiguousarray(stats[:, 2:]),
+        individual=roster.feature_rows(rows, individual_features),
+        individual_features=individual_features,
+    )
+
+
+@per_snapshot
+def get_synergy_table(snapshot) -> SynergyTable:
+    """Return the synergy table for a snapshot, building it once per snapshot version."""
+    return build_synergy_table(snapshot)
+
+
+def pad_teams(teams: list[list[int]]) -> np.ndarray:
+    """Stack variable-length lists of roster indices into a PAD-filled matrix."""
+    width = max((len(team) for team in teams), default=0)
+    matrix = np.full((len(teams), width), PAD, dtype=np.intp)
+    for row, team in enumerate(teams):
+        matrix[row, :len(team)] = team
+    return matrix
+
+
+def _distinct_count(codes: np.ndarray) -> np.ndarray:
+    """Number of distinct non-PAD values per row."""
+    ordered = np.sort(codes, axis=1)
+    first = np.ones((ordered.shape[0], 1), dtype=bool)
+    new_value = np.concatenate([first, ordered[:, 1:] != ordered[:, :-1]], axis=1)
+    return (new_value & (ordered != PAD)).sum(axis=1)
+
+
+def _max_multiplicity(codes: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Count of the most common non-PAD value per row (teams are small, so t x t is cheap)."""
+    same = (codes[:, :, None] == codes[:, None, :]) & valid[:, None, :]
+    return np.where(valid, same.sum(axis=2), 0).max(axis=1)
+
+
+def _nanmean(values: np.ndarray, valid: np.ndarray, axis: int = 1) -> np.ndarray:
+    """Mean over valid, non-NaN entries; NaN when there are none (like pandas' skipna mean)."""
+    present = valid & ~np.isnan(values)
+    count = present.sum(axis=axis)
+    total = np.where(present, values, 0.0).sum(axis=axis, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def compute_synergy_features_batch(table: SynergyTable, teams: np.ndarray) -> np.ndarray:
+    """
+    Synergy features for many teams in one vectorized pass.
+
+    `teams` is an (n_teams, team_size) integer matrix of row positions into
+    `table`; smaller teams are right-padded with PAD. Returns an
+    (n_teams, len(SYNERGY_TEAM_FEATURES)) float64 matrix. Counts and flags
+    equal `compute_synergy_features` for the same teams, and so do the means
+    and variance, NaNs included.
+    """
+    teams = np.asarray(teams, dtype=np.intp)
+    if teams.ndim != 2:
+        raise ValueError("teams must be a 2-D matrix of roster indices")
+
+    valid = teams != PAD
+    safe = np.where(valid, teams, 0)
+    members = valid.sum(axis=1)
+
+    roles = np.where(valid, table.role_codes[safe], PAD)
+    lanes = np.where(valid, table.lane_codes[safe], PAD)
+
+    features = np.empty((teams.shape[0], len(SYNERGY_TEAM_FEATURES)), dtype=np.float64)
+    features[:, 0] = _distinct_count(roles)
+    features[:, 1] = np.where(members > 0, _max_multiplicity(roles, valid), np.nan)
+    features[:, 2] = (table.is_support[safe] & valid).any(axis=1)
+    features[:, 3] = _distinct_count(lanes)
+    features[:, 4] = (table.is_jungle[safe] & valid).any(axis=1)
+    features[:, 5] = _nanmean(table.difficulty[safe], valid)
+    features[:, 6] = _nanmean(table.winrate[safe], valid)
+
+    # Sample variance (ddof=1) of each stat within the team, then averaged across stats
+    stats = table.stats[safe]                                   # (n_teams, team_size, 4)
+    stat_valid = valid[:, :, None] & ~np.isnan(stats)
+    count = stat_valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(stat_valid, stats, 0.0).sum(axis=1) / count
+        squared = np.where(stat_valid, (stats - mean[:, None, :]) ** 2, 0.0).sum(axis=1)
+        variance = np.where(count > 1, squared / (count - 1), np.nan)
+    features[:, 7] = _nanmean(variance, np.ones_like(variance, dtype=bool))
+
+    return features
+
+
+def build_synergy_inputs(table: SynergyTable, teams: np.ndarray, features: list[str]) -> np.ndarray:
+    """
+    Full synergy-model input rows for many teams: the mean of each member's
+    individual features followed by the team features, ordered as `features`.
+    """
+    teams = np.asarray(teams, dtype=np.intp)
+    valid = teams != PAD
+    safe = np.where(valid, teams, 0)
+
+    individual = table.individual[safe]                          # (n_teams, team_size, k)
+    individual_mean = _nanmean(individual, np.broadcast_to(valid[:, :, None], individual.shape))
+    team_features = compute_synergy_features_batch(table, teams)
+
+    columns = dict(zip(table.individual_features, individual_mean.T))
+    columns.update(zip(SYNERGY_TEAM_FEATURES, team_features.T))
+    return np.column_stack([columns.get(name, np.zeros(len(teams))) for name in features])
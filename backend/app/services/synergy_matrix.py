@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+import numpy as np
+
+from app.db import session_scope
+from app.data.feedback_teams import get_pair_counts
+from app.data.loader import per_snapshot
+from app.data.roster import get_roster_index
+from app.services.preview import PreviewBody, encode_body
+from app.services.synergy import MAX_TEAM_SIZE, SYNERGY_STAT_COLUMNS
+
+# Terms are in win-rate units (0.01 = one percentage point)
+ROLE_OVERLAP_PENALTY = 0.02     # per pair sharing a role
+LANE_OVERLAP_PENALTY = 0.015    # per pair sharing a preferred lane
+STAT_SPREAD_WEIGHT = 0.01       # per standard deviation of stat difference above the roster's average pair
+SUPPORT_BONUS = 0.01            # unary, mirrors has_support
+JUNGLE_BONUS = 0.01             # unary, mirrors has_jungle
+
+# Feedback for a pair is shrunk toward what its members' own win rates predict
+# as if this many extra games had been played at that rate
+PAIR_PRIOR_GAMES = 20
+PAIR_FEEDBACK_WEIGHT = 1.0
+
+
+@dataclass(frozen=True)
+class SynergyMatrix:
+    """
+    Additive team-synergy model for one dataset snapshot.
+
+    A team's estimated win rate is the mean of its members' unary scores plus
+    the sum of its pairwise terms divided by the team size, so scoring is a
+    small sum and adding or removing a member touches one row of `pairs`.
+    """
+    snapshot_version: str
+    names: list
+    unary: np.ndarray     # float32 (n,)
+    pairs: np.ndarray     # float32 (n, n), symmetric, zero diagonal
+
+    def score(self, rows: list[int]) -> float:
+        return TeamScore(self, rows).value
+
+    def candidate_scores(self, rows: list[int]) -> np.ndarray:
+        """Score of the team after adding each roster Pokémon; NaN for current members."""
+        n = len(rows) + 1
+        unary_sum = self.unary[rows].sum(dtype=np.float64)
+        pair_sum = self.pairs[np.ix_(rows, rows)].sum(dtype=np.float64) / 2
+        added = self.pairs[:, rows].sum(axis=1, dtype=np.float64)
+        scores = (unary_sum + self.unary) / n + (pair_sum + added) / n
+        scores[rows] = np.nan
+        return scores
+
+
+class TeamScore:
+    """Running score of a team under a SynergyMatrix; add/remove cost O(team size)."""
+
+    def __init__(self, matrix: SynergyMatrix, rows: list[int] = ()):
+        self.matrix = matrix
+        self.rows = []
+        self.unary_sum = 0.0
+        self.pair_sum = 0.0
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: int):
+        if row in self.rows:
+            raise ValueError(f"{self.matrix.names[row]} is already on the team")
+        self.pair_sum += float(self.matrix.pairs[row, self.rows].sum(dtype=np.float64))
+        self.unary_sum += float(self.matrix.unary[row])
+        self.rows.append(row)
+
+    def remove(self, row: int):
+        self.rows.remove(row)
+        self.pair_sum -= float(self.matrix.pairs[row, self.rows].sum(dtype=np.float64))
+        self.unary_sum -= float(self.matrix.unary[row])
+
+    @property
+    def value(self) -> float:
+        if not self.rows:
+            return float("nan")
+        return (self.unary_sum + self.pair_sum) / len(self.rows)
+
+    def contributions(self) -> list[float]:
+        """Each member's unary score plus half of its pair terms; their mean is the team score."""
+        sub = self.matrix.pairs[np.ix_(self.rows, self.rows)]
+        return (self.matrix.unary[self.rows] + sub.sum(axis=1) / 2).astype(np.float64).tolist()
+
+
+def build_synergy_matrix(snapshot, pair_wins: np.ndarray = None, pair_games: np.ndarray = None) -> SynergyMatrix:
+    """
+    Build unary scores and pair terms from the roster features and, when
+    given, per-pair feedback counts (row-aligned (n, n) matrices).
+    """
+    roster = get_roster_index(snapshot)
+    n = len(roster.names)
+
+    winrate = np.nan_to_num(roster.column("FeedbackBoostedWinRate")).astype(np.float64)
+    roles = roster.codes["Role"]
+    lanes = roster.codes["PreferredLane"]
+    supports = [roster.code_of("Role", role) for role in ("Support", "Supporter")]
+    is_support = np.isin(roles, [code for code in supports if code >= 0])
+    is_jungle = lanes == roster.code_of("PreferredLane", "Jungle")
+    unary = winrate + SUPPORT_BONUS * is_support + JUNGLE_BONUS * is_jungle
+
+    pairs = np.zeros((n, n), dtype=np.float64)
+    pairs -= ROLE_OVERLAP_PENALTY * (roles[:, None] == roles[None, :])
+    pairs -= LANE_OVERLAP_PENALTY * (lanes[:, None] == lanes[None, :])
+
+    # Mean squared stat difference: its sum over a team's pairs is proportional
+    # to synergy_variance, so spread across stats is rewarded pair by pair
+    stats = np.nan_to_num(roster.feature_rows(list(range(n)), SYNERGY_STAT_COLUMNS)).astype(np.float64)
+    spread = ((stats[:, None, :] - stats[None, :, :]) ** 2).mean(axis=2)
+    off_diagonal = ~np.eye(n, dtype=bool)
+    mean, std = spread[off_diagonal].mean(), spread[off_diagonal].std()
+    if std > 0:
+        pairs += STAT_SPREAD_WEIGHT * (spread - mean) / std
+
+    if pair_wins is not None and pair_games is not None:
+        expected = (winrate[:, None] + winrate[None, :]) / 2
+        observed = (pair_wins + PAIR_PRIOR_GAMES * expected) / (pair_games + PAIR_PRIOR_GAMES)
+        pairs += PAIR_FEEDBACK_WEIGHT * (observed - expected)
+
+    pairs[~off_diagonal] = 0.0
+    unary, pairs = unary.astype(np.float32), pairs.astype(np.float32)
+    for array in (unary, pairs):
+        array.flags.writeable = False
+    return SynergyMatrix(snapshot_version=snapshot.version, names=roster.names, unary=unary, pairs=pairs)
+
+
+def load_pair_feedback(roster) -> tuple[np.ndarray, np.ndarray]:
+    """Row-aligned (n, n) pair win and game counts from the feedback_pair table."""
+    n = len(roster.names)
+    wins = np.zeros((n, n))
+    games = np.zeros((n, n))
+    with session_scope() as db:
+        rows = get_pair_counts(db)
+    for first, second, pair_wins, pair_losses in rows:
+        i, j = roster.position(first), roster.position(second)
+        if i is None or j is None:
+            continue
+        wins[i, j] = wins[j, i] = pair_wins
+        games[i, j] = games[j, i] = pair_wins + pair_losses
+    return wins, games
+
+
+@per_snapshot
+def get_synergy_matrix(snapshot) -> SynergyMatrix:
+    """
+    Return the synergy matrix for a snapshot, building it once per snapshot
+    version. Feedback writes change the snapshot, so pair counts stay current.
+    """
+    wins, games = load_pair_feedback(get_roster_index(snapshot))
+    return build_synergy_matrix(snapshot, wins, games)
+
+
+@per_snapshot
+def get_synergy_matrix_body(snapshot) -> PreviewBody:
+    """GET /synergy-matrix payload, serialized and compressed once per snapshot."""
+    matrix = get_synergy_matrix(snapshot)
+    return encode_body({
+        "snapshot_version": matrix.snapshot_version,
+        "names": matrix.names,
+        "unary": np.round(matrix.unary.astype(np.float64), 4).tolist(),
+        "pairs": np.round(matrix.pairs.astype(np.float64), 4).tolist(),
+    })
+
+
+def score_team(team_list: list[str], top_k: int = 5) -> dict:
+    """
+    Synergy-matrix score of a (possibly partial) team, each member's share of
+    it and, while there are open slots, the best `top_k` Pokémon to add.
+    """
+    from app.data.loader import get_snapshot
+    from app.services.model import resolve_team
+
+    snapshot = get_snapshot()
+    matrix = get_synergy_matrix(snapshot)
+    team, rows, error = resolve_team(team_list, get_roster_index(snapshot))
+    if error:
+        raise ValueError(error)
+    if len(rows) > MAX_TEAM_SIZE:
+        raise ValueError(f"A team has at most {MAX_TEAM_SIZE} Pokémon")
+
+    running = TeamScore(matrix, rows)
+    result = {
+        "team": team,
+        "estimated_win_rate": round(running.value * 100, 2),
+        "contributions": [round(value * 100, 2) for value in running.contributions()],
+        "snapshot_version": matrix.snapshot_version,
+    }
+    if len(rows) < MAX_TEAM_SIZE:
+        scores = matrix.candidate_scores(rows)
+        best = np.argsort(np.where(np.isnan(scores), -np.inf, scores))[::-1][:top_k]
+        result["suggestions"] = [
+            {"name": matrix.names[row], "estimated_win_rate": round(float(scores[row]) * 100, 2)}
+            for row in best
+        ]
+    return result
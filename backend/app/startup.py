@@ -0,0 +1,85 @@
+import importlib
+import os
+import time
+import traceback
+from contextlib import contextmanager
+
+# Set WARMUP=false to skip loading data and models before the worker reports ready
+WARMUP = os.getenv("WARMUP", "true").lower() not in ("0", "false", "no")
+
+_process_started = time.perf_counter()
+_timings = []
+_ready_seconds = None
+
+
+@contextmanager
+def timed(step: str):
+    """Record how long a startup step takes (also when it fails)."""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        _timings.append({"step": step, "seconds": round(seconds, 4), "error": error})
+        print(f"Startup: {step} took {seconds * 1000:.0f} ms" + (f" ({error})" if error else ""))
+
+
+def _warm_step(step: str, action):
+    # A failed step is logged and skipped: the request that needs it will retry and report the error
+    try:
+        with timed(step):
+            action()
+    except Exception:
+        traceback.print_exc()
+
+
+def warm_up(data_views: bool = True, models: bool = True):
+    """
+    Load the dataset snapshot, derived tables and models so the first request
+    doesn't. API processes skip the models when a model pool serves them
+    (`models=False`); pool workers skip what only cheap routes read (`data_views=False`).
+    """
+    if not WARMUP:
+        return
+
+    from app.data.loader import get_snapshot
+    from app.data.roster import get_roster_index
+    from app.services.model import get_synergy_model
+    from app.services.preview import get_preview_cache
+    from app.services.registry import get_model_artifacts
+    from app.services.synergy import get_synergy_table
+    from app.services.synergy_matrix import get_synergy_matrix_body
+
+    try:
+        with timed("dataset snapshot"):
+            snapshot = get_snapshot()
+    except Exception:
+        traceback.print_exc()
+        snapshot = None
+
+    if snapshot is not None:
+        _warm_step("roster index", lambda: get_roster_index(snapshot))
+        if data_views:
+            _warm_step("synergy matrix", lambda: get_synergy_matrix_body(snapshot))
+            _warm_step("data preview", lambda: get_preview_cache(snapshot))
+        if models:
+            _warm_step("synergy table", lambda: get_synergy_table(snapshot))
+            _warm_step("synergy model", lambda: get_synergy_model(snapshot))
+    if models:
+        _warm_step("import lightgbm", lambda: importlib.import_module("lightgbm"))
+        _warm_step("difficulty model", get_model_artifacts)
+
+
+def startup_report() -> dict:
+    """Per-step startup timings and the time from the first app import until the worker was ready."""
+    return {"warmup": WARMUP, "steps": list(_timings), "ready_seconds": _ready_seconds}
+
+
+def mark_ready():
+    global _ready_seconds
+    _ready_seconds = round(time.perf_counter() - _process_started, 4)
+    print(f"Startup: ready after {_ready_seconds * 1000:.0f} ms")
@@ -1,4 +1,7 @@
 import os
+import shutil
+import matplotlib
+matplotlib.use("Agg")  # charts are rendered off the main thread, without a display
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import confusion_matrix
@@ -6,46 +9,65 @@ import pandas as pd
 from pandas import DataFrame
 
 CHART_DIR = os.path.join(os.path.dirname(__file__), "charts")
-os.makedirs(CHART_DIR, exist_ok=True)
-
-def save_chart(fig, filename):
-    """Saves chart to /charts only if it doesn't already exist."""
-    path = os.path.join(CHART_DIR, filename)
-    if os.path.exists(path):
-        print(f"Chart already exists: {filename}")
-        return path
+RUN_CHART_DIR = os.path.join(CHART_DIR, "runs")
+
+def run_chart_dir(run_id: str) -> str:
+    """Directory holding one training run's charts, e.g. charts/runs/2025-05-01_120000."""
+    return os.path.join(RUN_CHART_DIR, str(run_id).replace(" ", "_").replace(":", ""))
+
+def save_chart(fig, filename, chart_dir=CHART_DIR):
+    """Saves chart to `chart_dir`, replacing any previous version."""
+    os.makedirs(chart_dir, exist_ok=True)
+    path = os.path.join(chart_dir, filename)
     fig.savefig(path, bbox_inches='tight')
     plt.close(fig)
     print(f"Chart save: {path}")
     return path
 
-def plot_feature_importance(importances, feature_names):
+def plot_feature_importance(importances, feature_names, chart_dir=CHART_DIR):
     fig, ax = plt.subplots()
     sns.barplot(x=importances, y=feature_names, ax=ax)
     ax.set_title("Feature Importance")
     ax.set_xlabel("Importance Score")
     ax.set_ylabel("Feature")
-    return save_chart(fig, "feature_importance.png")
+    return save_chart(fig, "feature_importance.png", chart_dir)
 
-def plot_confusion_matrix(y_true, y_pred, labels):
+def plot_confusion_matrix(y_true, y_pred, labels, chart_dir=CHART_DIR):
     cm = confusion_matrix(y_true, y_pred)
     fig, ax = plt.subplots()
     sns.heatmap(cm, annot=True, xticklabels=labels, yticklabels=labels)
     ax.set_title("Confusion Matrix")
     ax.set_xlabel("Predicted")
     ax.set_ylabel("Actual")
-    return save_chart(fig, "confusion_matrix.png")
+    return save_chart(fig, "confusion_matrix.png", chart_dir)
 
-def plot_correlation(df: DataFrame, features: list[str], save_path: str = "correlation_heatmap.png") -> None:
+def plot_correlation(df: DataFrame, features: list[str], save_path: str = "correlation_heatmap.png", chart_dir=CHART_DIR) -> str:
     corr = df[features].corr()
-    
-    # Save numeric correlation matrix as CSV
-    csv_path = save_path.replace(".png", ".csv")
+
+    # Save numeric correlation matrix as CSV next to the chart
+    os.makedirs(chart_dir, exist_ok=True)
+    csv_path = os.path.join(chart_dir, save_path.replace(".png", ".csv"))
     corr.to_csv(csv_path)
-    
+
     fig, ax = plt.subplots()
     sns.heatmap(corr, annot=True, ax=ax)
-    plt.title("Feature correlation Matrix")
-    plt.tight_layout()
-    save_chart(fig, save_path)
-    plt.close()
\ No newline at end of file
+    ax.set_title("Feature correlation Matrix")
+    fig.tight_layout()
+    return save_chart(fig, save_path, chart_dir)
+
+def render_training_report(run_id: str, inputs: dict) -> list[str]:
+    """
+    Render one training run's charts into its run directory, then refresh the
+    latest copies in CHART_DIR. `inputs` is the "report_inputs" of a
+    `build_model` result.
+    """
+    chart_dir = run_chart_dir(run_id)
+    features = pd.DataFrame(inputs["features"], columns=inputs["feature_names"])
+    paths = [
+        plot_correlation(features, inputs["feature_names"], chart_dir=chart_dir),
+        plot_feature_importance(inputs["feature_importance"], inputs["feature_names"], chart_dir=chart_dir),
+        plot_confusion_matrix(inputs["y_true"], inputs["y_pred"], inputs["labels"], chart_dir=chart_dir),
+    ]
+    for filename in os.listdir(chart_dir):
+        shutil.copyfile(os.path.join(chart_dir, filename), os.path.join(CHART_DIR, filename))
+    return paths
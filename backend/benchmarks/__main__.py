@@ -0,0 +1,123 @@
+"""
+Benchmarks for the backend's hot paths, run against a throwaway SQLite database.
+
+    cd backend
+    python -m benchmarks run --output results.json
+    python -m benchmarks run --baseline results.json      # flag regressions
+    python -m benchmarks compare results.json new.json
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import warnings
+
+from benchmarks.harness import compare, environment, load_results, measure, print_table, write_results
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6]
+
+
+def log(message: str):
+    # Progress and tables go to stderr so `--output -` leaves clean JSON on stdout
+    print(message, file=sys.stderr)
+
+
+def run(args) -> tuple[dict, dict]:
+    # The app reads DATABASE_URL at import time, so point it at the benchmark database first
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="unitematch-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+    os.environ.setdefault("FEEDBACK_BUFFER_SIZE", "0")
+    warnings.filterwarnings("ignore")
+    log(f"Benchmark database: {db_path}")
+
+    from benchmarks import cases
+
+    quiet = contextlib.nullcontext if args.verbose else lambda: contextlib.redirect_stdout(io.StringIO())
+    sizes = sorted(args.sizes)
+    results = {}
+
+    def record(case_list, warmup=1):
+        for name, function, repeat in case_list:
+            if args.filter and not any(f in name for f in args.filter):
+                continue
+            with quiet():
+                results[name] = measure(function, repeat, warmup=warmup)
+            log(f"  {name}: p50 {results[name]['p50_ms']:.3f} ms")
+
+    cases.seed_feedback(sizes[0])
+    memory = cases.memory_report()
+    log(
+        f"  snapshot memory: frames {sum(memory['frames_kib'].values()):,.0f} KiB, "
+        f"roster index {memory['roster_index_kib']:,.0f} KiB, RSS {memory['rss_before_snapshot_kib']} -> "
+        f"{memory['rss_after_snapshot_kib']} -> {memory['rss_after_roster_index_kib']} KiB"
+    )
+    record(cases.core_cases(args.scale))
+    record(cases.predict_cases(args.scale))
+
+    for rows in sizes:
+        if cases.seed_feedback(rows) > rows:
+            log(f"  skipping size {rows:,}: the database already holds more rows")
+            continue
+        record(cases.feedback_cases(rows, args.scale))
+
+    if not args.skip_training:
+        with cases.preserved_training_outputs():
+            record(cases.training_cases(args.search, args.n_trials, args.scale), warmup=0)
+
+    return results, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Backend hot-path benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", default="-", help="JSON results file (default: stdout)")
+    run_parser.add_argument("--baseline", help="results file to compare against; exits 1 on regressions")
+    run_parser.add_argument("--db", help="SQLite file to use and keep (default: a temporary one)")
+    run_parser.add_argument(
+        "--sizes", type=lambda v: [int(float(s)) for s in v.split(",")], default=DEFAULT_SIZES,
+        help="feedback table sizes, e.g. 1e3,1e5,1e7 (default: 1e3 to 1e6)"
+    )
+    run_parser.add_argument("--filter", nargs="*", help="only run cases whose name contains one of these")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="multiply every repeat count")
+    run_parser.add_argument("--skip-training", action="store_true", help="skip the build_model cases")
+    run_parser.add_argument("--search", default="halving", choices=["grid", "random", "halving"])
+    run_parser.add_argument("--n-trials", type=int, default=None)
+    run_parser.add_argument("--verbose", action="store_true", help="show output from the benchmarked code")
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    for p in (run_parser, compare_parser):
+        p.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown (default: 0.2 = 20%%)")
+        p.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore smaller p50 differences")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        env = environment()
+        results, memory = run(args)
+        write_results(args.output, results, dict(env, memory=memory))
+        baseline = load_results(args.baseline) if args.baseline else None
+    else:
+        baseline, results = load_results(args.baseline), load_results(args.current)
+
+    print_table(results, baseline)
+    if baseline is None:
+        return
+
+    regressions = compare(baseline, results, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        log(
+            f"REGRESSION {regression['case']}: p50 {regression['baseline_p50_ms']:.3f} -> "
+            f"{regression['p50_ms']:.3f} ms ({regression['change']:+.0%})"
+        )
+    if regressions:
+        sys.exit(1)
+    log("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
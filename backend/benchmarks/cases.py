@@ -0,0 +1,220 @@
+import glob
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+import numpy as np
+
+TEAM = ["Pikachu", "Absol", "Alolan Raichu", "Snorlax", "Blissey"]
+BATCH_TEAMS = 1000
+PREDICT_ROWS = [1, 5, 50, 500, 5000]
+SEED = 20250501
+# Seeded feedback spans 2025, so weighting "as of" this day keeps the windows populated
+WEIGHTING_DAY = date(2026, 1, 1)
+
+
+def count_feedback() -> int:
+    from sqlalchemy import func
+    from app.db import session_scope
+    from app.data.feedback_model import Feedback
+
+    with session_scope() as db:
+        return db.query(func.count(Feedback.id)).scalar()
+
+
+def memory_report() -> dict:
+    """
+    What one dataset snapshot keeps in memory: its DataFrames, the compact
+    roster index built from them, and the process RSS before and after each.
+    The frames stay alive for previews, training and synergy training.
+    """
+    from app.data.loader import get_snapshot, invalidate_snapshot
+    from app.data.roster import get_roster_index
+    from benchmarks.harness import current_rss_kib
+
+    invalidate_snapshot()
+    rss_before = current_rss_kib()
+    snapshot = get_snapshot()
+    rss_snapshot = current_rss_kib()
+    roster = get_roster_index(snapshot)
+    rss_roster = current_rss_kib()
+
+    index_bytes = roster.features.nbytes + sum(codes.nbytes for codes in roster.codes.values())
+    frames_kib = {
+        name: round(frame.memory_usage(deep=True).sum() / 1024, 1)
+        for name, frame in (("final_df", snapshot.final_df), ("merged_df", snapshot.merged_df))
+    }
+    return {
+        "frames_kib": frames_kib,
+        "roster_index_kib": round(index_bytes / 1024, 1),
+        "rss_before_snapshot_kib": rss_before,
+        "rss_after_snapshot_kib": rss_snapshot,
+        "rss_after_roster_index_kib": rss_roster,
+    }
+
+
+def seed_feedback(rows: int, chunk: int = 200_000) -> int:
+    """
+    Grow the SQLite feedback table to `rows` synthetic entries, then rebuild
+    the aggregate table from it. Rows already there are kept, so a database
+    passed with --db is only topped up. Returns the row count afterwards.
+    """
+    import pandas as pd
+    from app.db import engine, session_scope
+    from app.data.feedback_aggregates import rebuild_feedback_aggregates
+    from app.data.feedback_model import Base
+    from app.data.loader import FILE, invalidate_snapshot
+
+    Base.metadata.create_all(bind=engine)
+    names = np.array(pd.read_csv(FILE)["Name"].astype(str).str.title())
+    results = np.array(["win", "loss"])
+
+    existing = count_feedback()
+    if existing < rows:
+        print(f"Seeding feedback: {existing:,} -> {rows:,} rows", file=sys.stderr)
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            for start in range(existing, rows, chunk):
+                size = min(chunk, rows - start)
+                rng = np.random.default_rng(SEED + start)
+                seconds = rng.integers(0, 365 * 86400, size)
+                timestamps = (np.datetime64("2025-01-01T00:00:00") + seconds.astype("timedelta64[s]")).astype(str)
+                cursor.executemany(
+                    "INSERT INTO feedback (name, result, timestamp) VALUES (?, ?, ?)",
+                    zip(
+                        names[rng.integers(0, len(names), size)].tolist(),
+                        results[rng.integers(0, 2, size)].tolist(),
+                        [t.replace("T", " ") + ".000000" for t in timestamps],
+                    )
+                )
+                connection.commit()
+        finally:
+            connection.close()
+
+    with session_scope() as db:
+        rebuild_feedback_aggregates(db)
+    invalidate_snapshot()
+    return max(existing, rows)
+
+
+@contextmanager
+def preserved_training_outputs():
+    """Put back the served model artifacts that `build_model` overwrites."""
+    from app.services.registry import ARTIFACT_PATHS, COMPILED_MODEL_PATH, RUN_MODEL_DIR
+
+    backup_dir = tempfile.mkdtemp(prefix="unitematch-bench-")
+    kept = [path for path in ARTIFACT_PATHS + [COMPILED_MODEL_PATH] if os.path.exists(path)]
+    for i, path in enumerate(kept):
+        shutil.copy2(path, os.path.join(backup_dir, str(i)))
+    runs_before = set(glob.glob(os.path.join(RUN_MODEL_DIR, "*")))
+    try:
+        yield
+    finally:
+        for i, path in enumerate(kept):
+            shutil.copy2(os.path.join(backup_dir, str(i)), path)
+        if os.path.exists(COMPILED_MODEL_PATH) and COMPILED_MODEL_PATH not in kept:
+            os.remove(COMPILED_MODEL_PATH)
+        for run_dir in set(glob.glob(os.path.join(RUN_MODEL_DIR, "*"))) - runs_before:
+            shutil.rmtree(run_dir, ignore_errors=True)
+        shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+def core_cases(scale: float) -> list:
+    """(name, function, repeat) for the request hot paths at the current feedback size."""
+    from app.data.loader import get_snapshot, invalidate_snapshot, load_data
+    from app.data.roster import get_roster_index
+    from app.services.model import (
+        cached_optimize_team, cached_synergy_winrate, compute_synergy_features, optimize_team, predict_synergy_winrate
+    )
+    from app.services.synergy import compute_synergy_features_batch, get_synergy_table
+    from app.services.synergy_matrix import get_synergy_matrix
+
+    def load_data_cold():
+        invalidate_snapshot()
+        load_data()
+
+    snapshot = get_snapshot()
+    roster = get_roster_index(snapshot)
+    _, rows, _ = roster.lookup(TEAM)
+    team_df = snapshot.merged_df.iloc[rows]
+
+    rng = np.random.default_rng(SEED)
+    teams = np.array([rng.choice(len(roster.names), 5, replace=False) for _ in range(BATCH_TEAMS)])
+    table = get_synergy_table(snapshot)
+    matrix = get_synergy_matrix(snapshot)
+
+    def repeat(n):
+        return max(3, int(n * scale))
+
+    return [
+        ("load_data_cold", load_data_cold, repeat(20)),
+        ("load_data", load_data, repeat(200)),
+        ("optimize_team", lambda: optimize_team(TEAM), repeat(200)),
+        ("predict_synergy_winrate", lambda: predict_synergy_winrate(TEAM), repeat(200)),
+        # The warm-up call fills the response cache, so these time the hit path
+        ("optimize_team_cached", lambda: cached_optimize_team(TEAM), repeat(200)),
+        ("synergy_winrate_cached", lambda: cached_synergy_winrate(TEAM), repeat(200)),
+        ("compute_synergy_features", lambda: compute_synergy_features(team_df), repeat(200)),
+        (f"compute_synergy_features_batch[{BATCH_TEAMS}]", lambda: compute_synergy_features_batch(table, teams), repeat(100)),
+        ("synergy_matrix_score", lambda: matrix.score(rows), repeat(200)),
+        ("synergy_matrix_candidates", lambda: matrix.candidate_scores(rows[:4]), repeat(200)),
+    ]
+
+
+def predict_cases(scale: float) -> list:
+    """Difficulty predictions over 1 to 5,000 feature rows, through LightGBM and the compiled trees."""
+    from dataclasses import replace
+    from app.data.loader import get_snapshot
+    from app.data.roster import get_roster_index
+    from app.services.compiled_model import compile_model
+    from app.services.model import predict_difficulty_codes
+    from app.services.registry import get_model_artifacts
+
+    artifacts = get_model_artifacts()
+    lightgbm = replace(artifacts, compiled=None)
+    compiled = replace(artifacts, compiled=artifacts.compiled or compile_model(artifacts.model, artifacts.version))
+    roster = get_roster_index(get_snapshot())
+    rng = np.random.default_rng(SEED)
+
+    cases = []
+    for n in PREDICT_ROWS:
+        X = roster.feature_rows(rng.integers(0, len(roster.names), n).tolist(), artifacts.features)
+        repeat = max(3, int(min(200, 2e5 / n) * scale))
+        cases += [
+            (f"difficulty_predict_lightgbm[{n}]", lambda X=X: predict_difficulty_codes(lightgbm, X), repeat),
+            (f"difficulty_predict_compiled[{n}]", lambda X=X: predict_difficulty_codes(compiled, X), repeat),
+        ]
+    return cases
+
+
+def feedback_cases(rows: int, scale: float) -> list:
+    """Feedback reads whose cost may grow with the raw feedback table."""
+    from app.db import session_scope
+    from app.data.feedback_aggregates import compute_raw_aggregates
+    from app.data.loader import get_feedback_aggregates, get_feedback_watermark
+
+    def raw_group_by():
+        with session_scope() as db:
+            compute_raw_aggregates(db)
+
+    # The raw GROUP BY scans the whole table, so it gets fewer repeats as it grows
+    raw_repeat = max(3, int(min(50, 5e7 / max(rows, 1)) * scale))
+    return [
+        (f"get_feedback_aggregates[{rows}]", lambda: get_feedback_aggregates("all"), max(3, int(200 * scale))),
+        (f"get_feedback_aggregates_window[{rows}]", lambda: get_feedback_aggregates("window", WEIGHTING_DAY), max(3, int(200 * scale))),
+        (f"get_feedback_aggregates_decay[{rows}]", lambda: get_feedback_aggregates("decay", WEIGHTING_DAY), max(3, int(200 * scale))),
+        (f"feedback_watermark[{rows}]", get_feedback_watermark, max(3, int(200 * scale))),
+        (f"feedback_raw_group_by[{rows}]", raw_group_by, raw_repeat),
+    ]
+
+
+def training_cases(search: str, n_trials, scale: float) -> list:
+    from app.services.model import build_model
+
+    return [
+        ("build_model", lambda: build_model(tune=False), max(3, int(5 * scale))),
+        (f"build_model_tuned[{search}]", lambda: build_model(tune=True, search=search, n_trials=n_trials), 1),
+    ]
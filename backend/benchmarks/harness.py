@@ -0,0 +1,145 @@
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+
+def measure(function, repeat: int, warmup: int = 1) -> dict:
+    """
+    Run `function` `warmup` + `repeat` times and summarize the timed calls.
+
+    Peak memory comes from one extra call under tracemalloc, so tracing
+    doesn't slow down the timed ones. It counts Python-level allocations
+    (NumPy and pandas buffers included), not native memory held by LightGBM.
+    """
+    for _ in range(warmup):
+        function()
+
+    samples = []
+    gc.collect()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ms = np.array(samples) * 1000
+    return {
+        "n": repeat,
+        "mean_ms": round(float(ms.mean()), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def environment() -> dict:
+    """What the numbers depend on, so results from different machines aren't compared blindly."""
+    import pandas as pd
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def max_rss_kib() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KiB on Linux
+
+
+def current_rss_kib():
+    """Resident set size right now (Linux only; None elsewhere), unlike the peak from getrusage."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def write_results(path: str, results: dict, env: dict):
+    document = {"environment": dict(env, max_rss_kib=max_rss_kib()), "results": results}
+    if path == "-":
+        json.dump(document, sys.stdout, indent=2)
+        print()
+        return
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2)
+    print(f"Results written to {path}", file=sys.stderr)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> list[dict]:
+    """
+    Cases whose p50 grew by more than `threshold` (a fraction) over the baseline.
+
+    Differences under `min_delta_ms` are ignored so sub-millisecond noise
+    doesn't flag regressions. Cases missing from either side are skipped.
+    """
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        delta = result["p50_ms"] - before["p50_ms"]
+        if delta > min_delta_ms and result["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            regressions.append({
+                "case": name,
+                "baseline_p50_ms": before["p50_ms"],
+                "p50_ms": result["p50_ms"],
+                "change": round(delta / before["p50_ms"], 3) if before["p50_ms"] else None,
+            })
+    return regressions
+
+
+def print_table(results: dict, baseline: dict = None, file=sys.stderr):
+    header = f"{'case':<44} {'n':>4} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'peak KiB':>10}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header, file=file)
+    for name, result in results.items():
+        line = (
+            f"{name:<44} {result['n']:>4} {result['p50_ms']:>10.3f} {result['p90_ms']:>10.3f} "
+            f"{result['p99_ms']:>10.3f} {result['peak_kib']:>10.1f}"
+        )
+        if baseline and name in baseline and baseline[name]["p50_ms"]:
+            line += f" {result['p50_ms'] / baseline[name]['p50_ms']:>7.2f}x"
+        print(line, file=file)
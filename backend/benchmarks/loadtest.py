@@ -0,0 +1,206 @@
+"""
+Mixed-traffic load test: cheap reads and feedback writes alongside model
+calls, to check cheap endpoints keep answering while the model pool is busy
+and that saturated model routes shed load with 429s.
+
+    cd backend
+    python -m benchmarks.loadtest --duration 20 --concurrency 32
+    python -m benchmarks.loadtest --url http://localhost:8000 --output load.json
+    python -m benchmarks.loadtest --scenario feedback-writes
+
+Without --url the app runs in this process (httpx ASGI transport) against a
+throwaway SQLite database, with its model pool as configured by MODEL_WORKERS.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.cases import SEED, TEAM
+
+HEAVY_BATCH_TEAMS = 2000
+
+# Default share of requests per traffic class (see requests_for)
+MIX = {"cheap": 0.45, "write": 0.15, "light": 0.3, "heavy": 0.1}
+# Named mixes; "feedback-writes" checks that a stream of writes doesn't slow
+# cheap reads through snapshot rebuilds (see SNAPSHOT_REFRESH_SECONDS)
+SCENARIOS = {
+    "mixed": MIX,
+    "feedback-writes": {"cheap": 0.5, "write": 0.5},
+}
+
+
+def log(message: str):
+    print(message, file=sys.stderr)
+
+
+def random_team(rng: random.Random, names: list, size: int = 5) -> list:
+    return rng.sample(names, size)
+
+
+def requests_for(traffic: str, rng: random.Random, names: list) -> tuple:
+    """(label, method, path, kwargs) of one request of a traffic class."""
+    if traffic == "cheap":
+        return rng.choice([
+            ("GET /", "GET", "/", {}),
+            ("GET /data-preview", "GET", "/data-preview", {}),
+            ("GET /feedback/matches", "GET", "/feedback/matches", {"params": {"names": rng.choice(names)}}),
+        ])
+    if traffic == "write":
+        # Every write moves the feedback watermark, so it also exercises the snapshot rebuilds that follow
+        return ("POST /feedback", "POST", "/feedback", {"json": {
+            "team": random_team(rng, names),
+            "result": rng.choice(["win", "loss"]),
+            "timestamp": datetime.now().isoformat(),
+        }})
+    if traffic == "light":
+        # A small pool of teams, so some calls are cache hits as in real traffic
+        team = random_team(random.Random(rng.randrange(50)), names)
+        return rng.choice([
+            ("POST /optimize-team", "POST", "/optimize-team", {"json": {"team": team}}),
+            ("POST /synergy-winrate", "POST", "/synergy-winrate", {"json": {"team": team}}),
+        ])
+    return rng.choice([
+        ("POST /optimize-team/batch", "POST", "/optimize-team/batch",
+         {"json": {"teams": [random_team(rng, names) for _ in range(HEAVY_BATCH_TEAMS)]}}),
+        ("POST /suggest-team", "POST", "/suggest-team", {"json": {"team": random_team(rng, names, 2), "top_k": 3}}),
+    ])
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        traffic, _, share = part.partition("=")
+        if traffic not in MIX:
+            raise argparse.ArgumentTypeError(f"Unknown traffic class {traffic!r}; use {', '.join(MIX)}")
+        mix[traffic] = float(share)
+    return mix
+
+
+async def user(client, deadline: float, rng: random.Random, names: list, mix: dict, samples: dict):
+    classes, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        traffic = rng.choices(classes, weights)[0]
+        label, method, path, kwargs = requests_for(traffic, rng, names)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        samples[label].append((time.perf_counter() - started, status))
+        if status == 429:
+            # Honour Retry-After loosely, as a well-behaved client would
+            await asyncio.sleep(rng.uniform(0.05, 0.2))
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    results = {}
+    for label, rows in sorted(samples.items()):
+        ms = np.array([seconds for seconds, _ in rows]) * 1000
+        ok = np.array([status == 200 for _, status in rows])
+        results[label] = {
+            "n": len(rows),
+            "per_second": round(len(rows) / elapsed, 2),
+            "ok_per_second": round(int(ok.sum()) / elapsed, 2),
+            "p50_ms": round(float(np.percentile(ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(ms, 95)), 2),
+            "p99_ms": round(float(np.percentile(ms, 99)), 2),
+            # p50 of successful calls only: 429s return at once and would flatter it
+            "ok_p50_ms": round(float(np.percentile(ms[ok], 50)), 2) if ok.any() else None,
+            "status": {str(status): count for status, count in Counter(s for _, s in rows).items()},
+        }
+    return results
+
+
+def print_table(results: dict, elapsed: float):
+    log(f"\n{'request':<28} {'n':>6} {'req/s':>8} {'ok/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  status")
+    for label, row in results.items():
+        status = " ".join(f"{code}x{count}" for code, count in sorted(row["status"].items()))
+        log(
+            f"{label:<28} {row['n']:>6} {row['per_second']:>8.1f} {row['ok_per_second']:>8.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}  {status}"
+        )
+    total = sum(row["n"] for row in results.values())
+    log(f"{'total':<28} {total:>6} {total / elapsed:>8.1f}   over {elapsed:.1f} s")
+
+
+async def run(args) -> dict:
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        app = None
+    else:
+        # The app reads DATABASE_URL at import time, so point it at a throwaway database first
+        db_path = os.path.join(tempfile.mkdtemp(prefix="unitematch-load-"), "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        warnings.filterwarnings("ignore")
+        log(f"Load test database: {db_path}")
+        from app.main import app
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=args.timeout)
+
+    try:
+        names = (await client.get("/data-preview", params={"fields": "Name"})).json()
+        names = [row["Name"] for row in names] if isinstance(names, list) else TEAM
+        if len(names) < 5:
+            names = TEAM
+
+        samples = defaultdict(list)
+        rng = random.Random(SEED)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            user(client, deadline, random.Random(rng.random()), names, args.mix, samples)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+        limits = (await client.get("/metrics/limits")).json()
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    results = summarize(samples, elapsed)
+    print_table(results, elapsed)
+    return {"elapsed_s": round(elapsed, 2), "concurrency": args.concurrency, "scenario": args.scenario, "mix": args.mix,
+            "results": results, "limits": limits}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Mixed-traffic load test.")
+    parser.add_argument("--url", help="server to load (default: the app in this process)")
+    parser.add_argument("--concurrency", type=int, default=32, help="simulated clients (default: 32)")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of traffic (default: 20)")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed", help="named traffic mix (default: mixed)")
+    parser.add_argument(
+        "--mix", type=parse_mix,
+        help="traffic shares, e.g. cheap=0.6,light=0.3,heavy=0.1 (overrides --scenario)"
+    )
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="also write the results as JSON to this file ('-' for stdout)")
+    args = parser.parse_args()
+    args.mix = args.mix or SCENARIOS[args.scenario]
+
+    results = asyncio.run(run(args))
+    if args.output:
+        text = json.dumps(results, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+
+# The app reads these at import time: an in-memory database, model work on
+# threads, and a snapshot that stays put for the whole run
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["MODEL_WORKERS"] = "0"
+os.environ["WARMUP"] = "false"
+os.environ["FEEDBACK_BUFFER_SIZE"] = "0"
+os.environ["RESPONSE_CACHE_PATH"] = ""
+os.environ["SNAPSHOT_REFRESH_SECONDS"] = "3600"
+os.environ["SYNERGY_RETRAIN_SECONDS"] = "3600"
+
+import pytest
+from fastapi.testclient import TestClient
+
+TEAM = ["Pikachu", "Absol", "Alolan Raichu", "Snorlax", "Blissey"]
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    from app.main import app
+    from app.services import model
+
+    # Train the synergy model once for this run instead of reading or replacing the served one
+    model.SYNERGY_MODEL_PATH = str(tmp_path_factory.mktemp("models") / "synergy_model.pkl")
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(app):
+    from app.db import session_scope
+
+    with session_scope() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def snapshot(app):
+    from app.data.loader import get_snapshot
+
+    return get_snapshot()
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+
+from app.data.roster import get_roster_index
+from app.services.compiled_model import PARITY_TOLERANCE, check_parity, compile_model
+from app.services.registry import get_model_artifacts
+
+
+def test_compiled_model_matches_lightgbm(snapshot):
+    artifacts = get_model_artifacts()
+    compiled = compile_model(artifacts.model, artifacts.version)
+    roster = get_roster_index(snapshot)
+    X = roster.feature_rows(list(range(len(roster.names))), artifacts.features)
+
+    expected = artifacts.model.predict(pd.DataFrame(X, columns=artifacts.features))
+    np.testing.assert_array_equal(compiled.predict(X), expected)
+    assert check_parity(compiled, artifacts.model, X) <= PARITY_TOLERANCE
@@ -0,0 +1,18 @@
+import asyncio
+import gc
+
+from sqlalchemy import text
+
+from app import db as database
+
+
+def test_db_limiters_are_dropped_with_their_event_loop(app):
+    async def query():
+        return await database.run_in_session(lambda session: session.execute(text("SELECT 1")).scalar())
+
+    before = len(database._db_limiters)
+    for _ in range(3):
+        assert asyncio.run(query()) == 1
+    gc.collect()
+
+    assert len(database._db_limiters) == before
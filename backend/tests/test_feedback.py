@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from app.data.feedback_ingest import ingest_matches
+from app.data.feedback_model import Feedback
+
+from conftest import TEAM
+
+
+def match(key=None, result="win", team=TEAM):
+    return {"team": team, "result": result, "timestamp": datetime(2025, 6, 1, 12), "idempotency_key": key}
+
+
+def test_ingest_skips_repeated_idempotency_keys(db):
+    first = ingest_matches(db, [match("retry-1")])
+    rows = db.query(Feedback).count()
+    again = ingest_matches(db, [match("retry-1")])
+
+    assert first == {"matches": 1, "duplicates": 0, "entries": len(TEAM)}
+    assert again == {"matches": 0, "duplicates": 1, "entries": 0}
+    assert db.query(Feedback).count() == rows
+
+
+def test_ingest_skips_repeated_keys_within_a_batch(db):
+    summary = ingest_matches(db, [match("batch-1"), match("batch-1", result="loss"), match(None), match(None)])
+    assert summary["matches"] == 3
+    assert summary["duplicates"] == 1
+
+
+@pytest.mark.parametrize("path", ["/feedback", "/feedback/batch"])
+@pytest.mark.parametrize("body", [
+    {"team": TEAM, "result": "draw", "timestamp": "2025-06-01T12:00:00"},
+    {"team": TEAM, "result": "win", "timestamp": "last tuesday"},
+])
+def test_malformed_feedback_is_rejected(client, db, path, body):
+    rows = db.query(Feedback).count()
+    payload = {"matches": [body]} if path == "/feedback/batch" else body
+
+    assert client.post(path, json=payload).status_code == 422
+    assert db.query(Feedback).count() == rows
+
+
+def test_feedback_accepts_iso_timestamps(client):
+    body = {"team": TEAM, "result": "loss", "timestamp": "2025-06-01T12:00:00", "idempotency_key": "iso-1"}
+    response = client.post("/feedback", json=body)
+    assert response.status_code == 200
+    assert response.json()["entries"] == len(TEAM)
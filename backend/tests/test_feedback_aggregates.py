@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from app.data.feedback_aggregates import check_feedback_aggregates, rebuild_feedback_aggregates
+from app.data.feedback_ingest import ingest_matches
+from app.data.feedback_model import FeedbackAggregate
+
+from conftest import TEAM
+
+
+def match(key, result="win", team=TEAM):
+    return {"team": team, "result": result, "timestamp": datetime(2025, 6, 1, 12), "idempotency_key": key}
+
+
+def totals(db) -> dict:
+    return {row.name: (row.wins, row.losses) for row in db.query(FeedbackAggregate)}
+
+
+def test_aggregates_agree_with_raw_tables_after_ingest_and_rebuild(db):
+    ingest_matches(db, [match("agg-1"), match("agg-2", result="loss"), match("agg-3", team=TEAM[:3]), match("agg-1")])
+    assert check_feedback_aggregates(db) == {}
+
+    before = totals(db)
+    assert before["Pikachu"][0] >= 2
+    rebuild_feedback_aggregates(db)
+    assert check_feedback_aggregates(db) == {}
+    assert totals(db) == before
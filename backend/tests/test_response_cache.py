@@ -0,0 +1,91 @@
+import dataclasses
+
+import numpy as np
+
+from app.services import model
+from app.services.response_cache import OPTIMIZE_CACHE, SYNERGY_CACHE, ResponseCache
+
+from conftest import TEAM
+
+
+def test_alternating_generations_keep_their_entries():
+    cache = ResponseCache("test")
+    calls = []
+
+    def answer(generation):
+        return lambda: calls.append(generation) or {"generation": list(generation)}
+
+    # Two workers on either side of a reload keep asking under their own generation
+    for _ in range(3):
+        for generation in (("m1", "s1"), ("m2", "s1")):
+            assert cache.get_or_compute(generation, TEAM, answer(generation)) == {"generation": list(generation)}
+
+    assert calls == [("m1", "s1"), ("m2", "s1")]
+    assert cache.stats()["entries"] == 2
+
+
+def test_old_generations_age_out_through_the_lru():
+    cache = ResponseCache("test", max_bytes=3 * (len(TEAM) * 12 + 300))
+    for version in range(10):
+        cache.get_or_compute((str(version), "s1"), TEAM, lambda: {"v": version})
+
+    assert 0 < cache.stats()["entries"] < 10
+    assert cache.stats()["evictions"] > 0
+    assert cache.get_or_compute(("9", "s1"), TEAM, lambda: {"v": "recomputed"}) == {"v": 9}
+
+
+def test_optimize_cache_key_follows_model_swap(monkeypatch, snapshot):
+    served = model.get_model_artifacts()
+    first = model.cached_optimize_team(TEAM)
+    assert first["model_version"] == served.version
+
+    class FirstClass:
+        def predict(self, X):
+            return np.zeros(len(X), dtype=int)
+
+    swapped = dataclasses.replace(served, model=FirstClass(), compiled=None, version="swapped")
+    monkeypatch.setattr(model, "get_model_artifacts", lambda: swapped)
+    misses = OPTIMIZE_CACHE.counts["miss"]
+    second = model.cached_optimize_team(TEAM)
+
+    # A new key, and the value comes from the swapped model, not the one the old key names
+    assert OPTIMIZE_CACHE.counts["miss"] == misses + 1
+    assert second["model_version"] == "swapped"
+    first_class = served.encoder.classes_[0]
+    assert all(entry["predicted_difficulty"] == first_class for entry in second["optimized"])
+
+
+def test_synergy_cache_key_follows_model_swap(monkeypatch, snapshot):
+    bundle = model.get_synergy_model(snapshot)
+    first = model.cached_synergy_winrate(TEAM)
+
+    class Constant:
+        def predict(self, X):
+            return np.full(len(X), 0.5)
+
+    swapped = dict(bundle, model=Constant(), version="swapped")
+    monkeypatch.setattr(model, "get_synergy_model", lambda snapshot: swapped)
+    misses = SYNERGY_CACHE.counts["miss"]
+    second = model.cached_synergy_winrate(TEAM)
+
+    assert SYNERGY_CACHE.counts["miss"] == misses + 1
+    assert second["estimated_win_rate"] == 50.0
+    assert first["team"] == second["team"]
+
+
+def test_cache_miss_uses_the_model_it_was_keyed_on(monkeypatch, snapshot):
+    served = model.get_model_artifacts()
+    expected = model.optimize_team_batch([TEAM[:3]], artifacts=served)["results"][0]["optimized"]
+
+    class FirstClass:
+        def predict(self, X):
+            return np.zeros(len(X), dtype=int)
+
+    # A hot reload right after the key was read: later lookups see another model
+    swapped = dataclasses.replace(served, model=FirstClass(), compiled=None, version="reloaded")
+    lookups = iter([served])
+    monkeypatch.setattr(model, "get_model_artifacts", lambda: next(lookups, swapped))
+    result = model.cached_optimize_team(TEAM[:3])
+
+    assert result["model_version"] == served.version
+    assert result["optimized"] == expected
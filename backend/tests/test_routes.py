@@ -0,0 +1,32 @@
+import pytest
+
+from conftest import TEAM
+
+BATCH = [TEAM, ["Pikachu", "Not A Pokemon"], list(reversed(TEAM)), ["absol", "ABSOL"], TEAM[:2]]
+
+
+@pytest.mark.parametrize("path", ["/optimize-team/batch", "/synergy-winrate/batch"])
+def test_batch_routes_keep_order_and_report_errors_per_team(client, path):
+    response = client.post(path, json={"teams": BATCH})
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [result["team"] for result in results] == [
+        TEAM, ["Pikachu", "Not A Pokemon"], list(reversed(TEAM)), ["Absol", "Absol"], TEAM[:2]
+    ]
+    assert ["error" in result for result in results] == [False, True, False, True, False]
+    assert "Not A Pokemon" in results[1]["error"]
+    if path == "/optimize-team/batch":
+        assert [entry["name"] for entry in results[2]["optimized"]] == list(reversed(TEAM))
+
+
+def test_batch_answers_match_single_team_routes(client):
+    batch = client.post("/optimize-team/batch", json={"teams": [TEAM]}).json()["results"][0]
+    single = client.post("/optimize-team", json={"team": TEAM}).json()
+    assert batch["optimized"] == single["optimized"]
+
+
+@pytest.mark.parametrize("path", ["/optimize-team", "/synergy-winrate", "/synergy-score"])
+@pytest.mark.parametrize("team", [["Pikachu", "Not A Pokemon"], ["Absol", "absol"], []])
+def test_single_team_routes_reject_invalid_teams(client, path, team):
+    assert client.post(path, json={"team": team}).status_code == 400
@@ -0,0 +1,26 @@
+import pytest
+
+from app.services.search import suggest_teams
+
+from conftest import TEAM
+
+
+def test_banned_member_of_the_partial_team_is_rejected(app):
+    with pytest.raises(ValueError, match="Absol"):
+        suggest_teams(TEAM[:2], banned=["absol"], top_k=1, beam_width=2)
+
+
+def test_banned_member_of_the_partial_team_is_a_400(client):
+    body = {"team": TEAM[:2], "banned": ["Pikachu"]}
+    assert client.post("/suggest-team", json=body).status_code == 400
+
+
+def test_memoized_suggestions_are_returned_as_copies(app):
+    first = suggest_teams(TEAM[:3], top_k=2, beam_width=2)
+    expected = [dict(s, team=list(s["team"]), added=list(s["added"])) for s in first["suggestions"]]
+    first["suggestions"][0]["team"].clear()
+    first["team"].append("Mew")
+
+    second = suggest_teams(TEAM[:3], top_k=2, beam_width=2)
+    assert second["suggestions"] == expected
+    assert second["team"] == TEAM[:3]
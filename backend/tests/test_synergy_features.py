@@ -0,0 +1,18 @@
+import numpy as np
+
+from app.services.model import compute_synergy_features
+from app.services.synergy import SYNERGY_TEAM_FEATURES, compute_synergy_features_batch, get_synergy_table, pad_teams
+
+
+def test_batch_synergy_features_match_scalar(snapshot):
+    table = get_synergy_table(snapshot)
+    rng = np.random.default_rng(1)
+    teams = [list(rng.choice(len(table.names), rng.integers(1, 6), replace=False)) for _ in range(300)]
+
+    batch = compute_synergy_features_batch(table, pad_teams(teams))
+    scalar = np.vstack([
+        compute_synergy_features(snapshot.merged_df.iloc[rows])[SYNERGY_TEAM_FEATURES].to_numpy(dtype=float)
+        for rows in teams
+    ])
+
+    np.testing.assert_array_equal(batch, scalar)
@@ -0,0 +1,38 @@
+import dataclasses
+import time
+
+from app.services import model
+
+from conftest import TEAM
+
+
+def test_synergy_model_trains_once_per_snapshot(monkeypatch, snapshot, tmp_path):
+    trained = []
+    train = model.train_synergy_model
+
+    def counting_train(snapshot):
+        trained.append(snapshot.version)
+        return train(snapshot)
+
+    current = [snapshot]
+    monkeypatch.setattr(model, "train_synergy_model", counting_train)
+    monkeypatch.setattr(model, "get_snapshot", lambda: current[0])
+    monkeypatch.setattr(model, "SYNERGY_MODEL_PATH", str(tmp_path / "synergy_model.pkl"))
+    monkeypatch.setattr(model, "_synergy_bundle", None)
+    monkeypatch.setattr(model, "_synergy_retrained_at", None)
+
+    first = model.predict_synergy_winrate(TEAM)
+    assert model.predict_synergy_winrate(TEAM) == first
+    assert trained == [snapshot.version]
+
+    # A new snapshot: the previous model keeps answering while one retrain runs in the background
+    current[0] = dataclasses.replace(snapshot, version="next")
+    assert model.predict_synergy_winrate(TEAM) == first
+    deadline = time.monotonic() + 60
+    while model._synergy_refreshing.is_set() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    model.predict_synergy_winrate(TEAM)
+    model.predict_synergy_winrate(TEAM)
+
+    assert trained == [snapshot.version, "next"]
+    assert model._synergy_bundle["snapshot_version"] == "next"